@@ -1,29 +1,28 @@
 import io
+import json
 import math
 import os
 import re
 import tempfile
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import wraps
-from html import unescape
 from timeit import default_timer
-from flask import request, jsonify
 
 import argostranslatefiles
 from argostranslatefiles import get_supported_formats
-from flask import Blueprint, Flask, Response, abort, jsonify, render_template, request, send_file, session, url_for, make_response
+from flask import Blueprint, Flask, Response, abort, jsonify, render_template, request, send_file, session, stream_with_context, url_for, make_response
 from flask_babel import Babel
 from flask_session import Session
 from flask_swagger import swagger
 from flask_swagger_ui import get_swaggerui_blueprint
-from translatehtml import translate_html
 from werkzeug.exceptions import HTTPException
 from werkzeug.http import http_date
 from werkzeug.utils import secure_filename
 
-from libretranslate import flood, remove_translated_files, scheduler, secret, security, storage
-from libretranslate.language import model2iso, iso2model, detect_languages, improve_translation_formatting
+from libretranslate import batcher, cache, engine, flood, memory, pool, remove_translated_files, residency, scheduler, secret, security, segmentation, storage, warmup
+from libretranslate.language import model2iso, iso2model, detect_languages, detect_translatable
 from libretranslate.locales import (
     _,
     _lazy,
@@ -40,25 +39,18 @@ from .suggestions import Database as SuggestionsDatabase
 from .interlnkd.translations.translations import translations_blueprint
 from .interlnkd.config import config
 from .interlnkd.celery_utils import make_celery
-from .interlnkd.utils import is_csv_file
+from .interlnkd.constants import TRANSLATIONS_PENDING_FOLDER
+from .interlnkd.jobspec import JobSpec
+from .interlnkd.scheduling import dispatch_file, get_redis, get_route
 from .interlnkd.translations.tasks import generate_product_translations
+from .interlnkd.jobs.tasks import translate_file_job, translate_texts_job
 from flask_celeryext import FlaskCeleryExt
 
 ext_celery = FlaskCeleryExt(create_celery_app=make_celery)
 
-# Rough map of emoji characters
-emojis = {e: True for e in \
-  [ord(' ')] +                    # Spaces
-  list(range(0x1F600,0x1F64F)) +  # Emoticons
-  list(range(0x1F300,0x1F5FF)) +  # Misc Symbols and Pictographs
-  list(range(0x1F680,0x1F6FF)) +  # Transport and Map
-  list(range(0x2600,0x26FF)) +    # Misc symbols
-  list(range(0x2700,0x27BF)) +    # Dingbats
-  list(range(0xFE00,0xFE0F)) +    # Variation Selectors
-  list(range(0x1F900,0x1F9FF)) +  # Supplemental Symbols and Pictographs
-  list(range(0x1F1E6,0x1F1FF)) +  # Flags
-  list(range(0x20D0,0x20FF))      # Combining Diacritical Marks for Symbols
-}
+# Translates the targets of multi-target requests. Shared by all the
+# requests, so that its threads keep their stanza pipelines (see engine.get_stanza_pipeline)
+target_executor = None
 
 def get_version():
     try:
@@ -173,24 +165,6 @@ def get_routes_limits(args, api_keys_db):
 
     return res
 
-def filter_unique(seq, extra):
-    seen = set({extra, ""})
-    seen_add = seen.add
-    return [x for x in seq if not (x in seen or seen_add(x))]
-
-
-def detect_translatable(src_texts):
-  if isinstance(src_texts, list):
-    return any(detect_translatable(t) for t in src_texts)
-
-  for ch in src_texts:
-    if not (ord(ch) in emojis):
-      return True
-
-  # All emojis
-  return False
-
-
 def create_app(args):
     config_name = getattr(args, "config_name", None)
 
@@ -201,7 +175,7 @@ def create_app(args):
 
     boot(args.load_only, args.update_models, args.force_update_models)
 
-    from libretranslate.language import load_languages
+    from libretranslate.language import get_language, get_translation, load_languages
 
     swagger_url = args.url_prefix + "/docs"  # Swagger UI (w/o trailing '/')
     api_url = "/spec"
@@ -223,10 +197,7 @@ def create_app(args):
             "obj", (object,), {"code": "auto", "name": _("Auto Detect")}
         )
     else:
-        frontend_argos_language_source = next(
-            iter([l for l in languages if l.code == args.frontend_language_source]),
-            None,
-        )
+        frontend_argos_language_source = get_language(args.frontend_language_source)
     if frontend_argos_language_source is None:
         frontend_argos_language_source = languages[0]
 
@@ -236,18 +207,14 @@ def create_app(args):
     if args.frontend_language_target == "locale":
       def resolve_language_locale():
           loc = get_locale()
-          language_target = next(
-              iter([l for l in languages if l.code == loc]), None
-          )
+          language_target = get_language(loc)
           if language_target is None:
             language_target = language_target_fallback
           return language_target
 
       frontend_argos_language_target = resolve_language_locale
     else:
-      language_target = next(
-          iter([l for l in languages if l.code == args.frontend_language_target]), None
-      )
+      language_target = get_language(args.frontend_language_target)
       if language_target is None:
         language_target = language_target_fallback
       frontend_argos_language_target = lambda: language_target
@@ -283,6 +250,25 @@ def create_app(args):
           else:
             return get_remote_address
 
+        def charge_limits(cost):
+          # Count cost more requests against the limits of the current
+          # endpoint (the same counters the limiter uses once a request
+          # completes). Returns False if a limit is exceeded, without
+          # charging any of them
+          from limits import parse_many
+
+          key = get_limits_key_func()()
+          items = [item for route_limits in get_routes_limits(args, api_keys_db) for item in parse_many(route_limits())]
+
+          # test() only checks a cost of 1 (limits 2.x): compare the cost
+          # with what remains of each window instead
+          if any(limiter.limiter.get_window_stats(item, key, request.endpoint)[1] < cost for item in items):
+            return False
+
+          for item in items:
+            limiter.limiter.hit(item, key, request.endpoint, cost=cost)
+          return True
+
         limiter = Limiter(
             key_func=get_limits_key_func(),
             default_limits=get_routes_limits(
@@ -298,6 +284,9 @@ def create_app(args):
 
         limiter = Limiter()
 
+        def charge_limits(cost):
+          return True
+
     if not "gunicorn" in os.environ.get("SERVER_SOFTWARE", ""):
       # Gunicorn starts the scheduler in the master process
       scheduler.setup(args)
@@ -334,6 +323,26 @@ def create_app(args):
       gauge_request = Gauge('libretranslate_http_requests_in_flight', 'Active requests', ['endpoint', 'request_ip', 'api_key'], multiprocess_mode='livesum')
       gauge_request.labels('/translate', '127.0.0.1', '')
 
+      memory.setup_metrics()
+
+    cache.setup(args)
+    residency.setup(args.model_memory_budget, args.metrics)
+    segmentation.setup(args.segment_cache_size)
+    pool.setup(args.translation_workers, args.translation_worker_threads, warmup.get_pairs(args.warmup), args.model_memory_budget,
+               args.segment_cache_size)
+    micro_batcher = batcher.setup(args)
+
+    global target_executor
+    if target_executor is None:
+        target_executor = ThreadPoolExecutor(max_workers=max(1, args.threads), thread_name_prefix="translate-targets")
+
+    if args.preload and "gunicorn" in os.environ.get("SERVER_SOFTWARE", ""):
+        # The workers are forked after this: they share what is loaded
+        # here and warm up their own models in post_fork (see scripts/gunicorn_conf.py)
+        memory.preload()
+    else:
+        warmup.setup(args)
+
     def access_check(f):
         @wraps(f)
         def func(*a, **kw):
@@ -409,6 +418,7 @@ def create_app(args):
                 request.duration = max(default_timer() - start_t, 0)
                 measure_request.labels(request.path, status, ip, ak).observe(request.duration)
                 g.dec()
+                memory.update_metrics()
           return measure_func
         else:
           @wraps(func)
@@ -569,6 +579,189 @@ def create_app(args):
         response.headers.add("Access-Control-Max-Age", 60 * 60 * 24 * 20)
         return response
 
+    def get_src_texts(q, char_limit):
+        """
+        Returns the texts of a request as a list, checked against the
+        batch and character limits. Aborts if they are invalid.
+        """
+        if not request.is_json and isinstance(q, str):
+            # Normalize line endings to UNIX style (LF) only so we can consistently
+            # enforce character limits.
+            # https://www.rfc-editor.org/rfc/rfc2046#section-4.1.1
+            q = "\n".join(q.splitlines())
+
+        batch = isinstance(q, list)
+
+        if batch and args.batch_limit != -1:
+            batch_size = len(q)
+            if args.batch_limit < batch_size:
+                abort(
+                    400,
+                    description=_("Invalid request: request (%(size)s) exceeds text limit (%(limit)s)", size=batch_size, limit=args.batch_limit),
+                )
+
+        src_texts = q if batch else [q]
+
+        if not all(isinstance(text, str) for text in src_texts):
+            abort(400, description=_("Invalid request: %(name)s parameter must be a string or a list of strings", name='q'))
+
+        if char_limit != -1:
+            for text in src_texts:
+                if len(text) > char_limit:
+                    abort(
+                        400,
+                        description=_("Invalid request: request (%(size)s) exceeds text limit (%(limit)s)", size=len(text), limit=char_limit),
+                    )
+
+        return src_texts
+
+    def detect_items(src_texts, source_lang):
+        """
+        Returns which texts can be translated and their source languages
+        (detected, for "auto").
+        """
+        # Items made only of emojis are sent back as they are
+        translatable = detect_translatable(src_texts)
+
+        if source_lang != "auto":
+            detected_src_langs = [{"confidence": 100.0, "language": source_lang}] * len(src_texts)
+        else:
+            detected_src_langs = [{"confidence": 0.0, "language": "en"}] * len(src_texts)
+            indices = [i for i, t in enumerate(translatable) if t]
+
+            if indices:
+                # Batches can mix languages: detect each item on its own
+                detections = detect_languages([src_texts[i] for i in indices], per_item=True)
+
+                for i, d in zip(indices, detections):
+                    detected_src_langs[i] = d
+
+        return translatable, detected_src_langs
+
+    def get_group_translators(detected_src_langs, translatable, source_lang, target_lang):
+        """
+        Groups the translatable items by source language, so that each
+        language is translated with a single batched call. Returns the
+        translator and the item indices of each group.
+        Aborts if a language is not supported.
+        """
+        groups = {}
+        for i, d in enumerate(detected_src_langs):
+            # Untranslatable items are sent back as they are: they don't
+            # need a translator (nor a detected language)
+            if translatable[i]:
+                groups.setdefault(d["language"], []).append(i)
+
+        tgt_lang = get_language(target_lang)
+
+        if tgt_lang is None:
+            abort(400, description=_("%(lang)s is not supported",lang=target_lang))
+
+        translators = {}
+        for code, indices in groups.items():
+            src_lang = get_language(code)
+
+            if src_lang is None:
+                abort(400, description=_("%(lang)s is not supported", lang=source_lang))
+
+            translator = get_translation(src_lang, tgt_lang)
+            if translator is None:
+                abort(400, description=_("%(tname)s (%(tcode)s) is not available as a target language from %(sname)s (%(scode)s)", tname=_lazy(tgt_lang.name), tcode=tgt_lang.code, sname=_lazy(src_lang.name), scode=src_lang.code))
+
+            translators[code] = (translator, indices)
+
+        return translators
+
+    def translate_with(translator, texts, text_format, num_alternatives):
+        if micro_batcher is not None:
+            return micro_batcher.translate(translator, texts, text_format, num_alternatives)
+        return engine.translate_texts(translator, texts, text_format, num_alternatives)
+
+    def translate_groups(src_texts, translatable, translators, text_format, num_alternatives, pivots=None):
+        """
+        Runs the translations of the groups. Doesn't need the request
+        context, so it can run in other threads. pivots holds the texts
+        already translated to the pivot language of composite translations
+        (by group), which then only go through the second model.
+        """
+        # Cannot translate, send the original text back
+        batch_results = [None if ok else text for text, ok in zip(src_texts, translatable)]
+        batch_alternatives = [None if ok else [] for ok in translatable]
+
+        for code, (translator, indices) in translators.items():
+            pivot = engine.get_pivot(translator)
+            if pivots and pivot is not None and (code, pivot[0].to_lang.code) in pivots:
+                intermediate = pivots[(code, pivot[0].to_lang.code)]
+                translated = engine.translate_pivoted(translator, [src_texts[i] for i in indices], intermediate)
+            else:
+                translated = translate_with(translator, [src_texts[i] for i in indices], text_format, num_alternatives)
+
+            for i, (t, a) in zip(indices, translated):
+                batch_results[i] = t
+                batch_alternatives[i] = a
+
+        return batch_results, batch_alternatives
+
+    def check_format(text_format):
+        if not text_format:
+            text_format = "text"
+
+        if text_format not in ["text", "html"]:
+            abort(400, description=_("%(format)s format is not supported", format=text_format))
+
+        return text_format
+
+    def translate_items(src_texts, source_lang, target_lang, text_format, num_alternatives):
+        """
+        Translates a list of texts. Returns the translated texts, their
+        alternatives and their (detected) source languages.
+        Aborts if a language or the format is not supported.
+        """
+        translatable, detected_src_langs = detect_items(src_texts, source_lang)
+        translators = get_group_translators(detected_src_langs, translatable, source_lang, target_lang)
+        text_format = check_format(text_format)
+
+        batch_results, batch_alternatives = translate_groups(src_texts, translatable, translators, text_format, num_alternatives)
+        return batch_results, batch_alternatives, detected_src_langs
+
+    def translate_items_multi(src_texts, source_lang, target_langs, text_format, num_alternatives):
+        """
+        Translates a list of texts to several languages. The texts are
+        detected once and the target languages are translated concurrently.
+        Returns the translated texts and alternatives by target language,
+        and the (detected) source languages.
+        """
+        translatable, detected_src_langs = detect_items(src_texts, source_lang)
+        translators = {t: get_group_translators(detected_src_langs, translatable, source_lang, t) for t in target_langs}
+        text_format = check_format(text_format)
+
+        # Targets reached through the same pivot (e.g. English) share the
+        # first half of their translation. Only plain text without
+        # alternatives chains the same way as a composite translation.
+        pivots = None
+        if text_format == "text" and num_alternatives == 0:
+            pivot_groups = {}
+            for groups in translators.values():
+                for code, (translator, indices) in groups.items():
+                    pivot = engine.get_pivot(translator)
+                    if pivot is not None:
+                        pivot_groups.setdefault((code, pivot[0].to_lang.code), []).append((pivot[0], indices))
+
+            pivots = {}
+            for key, uses in pivot_groups.items():
+                if len(uses) > 1:
+                    first, indices = uses[0]
+                    texts = [src_texts[i] for i in indices]
+                    # The raw output of the first model, as a composite
+                    # translation hands it to the second one
+                    pivots[key] = engine.translate_raw(first, texts)
+
+        futures = {t: target_executor.submit(translate_groups, src_texts, translatable, translators[t], text_format, num_alternatives, pivots)
+                   for t in target_langs}
+        results = {t: f.result() for t, f in futures.items()}
+
+        return results, detected_src_langs
+
     @bp.post("/translate")
     @access_check
     def translate():
@@ -598,10 +791,16 @@ def create_app(args):
           - in: formData
             name: target
             schema:
-              type: string
-              example: es
+              oneOf:
+                - type: string
+                  example: es
+                - type: array
+                  example: ['es', 'de']
             required: true
-            description: Target language code
+            description: >
+              Target language code, or a list of target language codes (JSON
+              requests only). With a list, translatedText (and alternatives)
+              map each target language to its translation(s)
           - in: formData
             name: format
             schema:
@@ -640,7 +839,8 @@ def create_app(args):
                   oneOf:
                     - type: string
                     - type: array
-                  description: Translated text(s)
+                    - type: object
+                  description: Translated text(s), by target language when target is a list
                 detectedLanguage:
                   oneOf:
                     - type: object
@@ -748,135 +948,561 @@ def create_app(args):
         if args.alternatives_limit != -1 and num_alternatives > args.alternatives_limit:
             abort(400, description=_("Invalid request: %(name)s parameter must be <= %(value)s", name='alternatives', value=args.alternatives_limit))
 
-        if not request.is_json:
-            # Normalize line endings to UNIX style (LF) only so we can consistently
-            # enforce character limits.
-            # https://www.rfc-editor.org/rfc/rfc2046#section-4.1.1
-            q = "\n".join(q.splitlines())
-
         char_limit = get_char_limit(args.char_limit, api_keys_db)
-
         batch = isinstance(q, list)
+        src_texts = get_src_texts(q, char_limit)
 
-        if batch and args.batch_limit != -1:
-            batch_size = len(q)
-            if args.batch_limit < batch_size:
+        if isinstance(target_lang, list):
+            # Several targets: one result by target language
+            target_langs = list(dict.fromkeys(target_lang))
+            if not target_langs or not all(isinstance(t, str) and t for t in target_langs):
+                abort(400, description=_("Invalid request: missing %(name)s parameter", name='target'))
+
+            if args.batch_limit != -1 and len(src_texts) * len(target_langs) > args.batch_limit:
                 abort(
                     400,
-                    description=_("Invalid request: request (%(size)s) exceeds text limit (%(limit)s)", size=batch_size, limit=args.batch_limit),
+                    description=_("Invalid request: request (%(size)s) exceeds text limit (%(limit)s)", size=len(src_texts) * len(target_langs), limit=args.batch_limit),
                 )
 
-        src_texts = q if batch else [q]
+            request.req_cost = max(1, len(src_texts) * len(target_langs))
 
-        if char_limit != -1:
-            for text in src_texts:
-                if len(text) > char_limit:
-                    abort(
-                        400,
-                        description=_("Invalid request: request (%(size)s) exceeds text limit (%(limit)s)", size=len(text), limit=char_limit),
-                    )
+            results, detected_src_langs = translate_items_multi(src_texts, source_lang, target_langs, text_format, num_alternatives)
+
+            index = slice(None) if batch else 0
+            result = {"translatedText": {model2iso(t): r[0][index] for t, r in results.items()}}
+
+            if source_lang == "auto":
+                result["detectedLanguage"] = model2iso(detected_src_langs[index])
+            if num_alternatives > 0:
+                result["alternatives"] = {model2iso(t): r[1][index] for t, r in results.items()}
+
+            return jsonify(result)
 
         if batch:
             request.req_cost = max(1, len(q))
 
-        translatable = detect_translatable(src_texts)
-        if translatable:
-          if source_lang == "auto":
-              candidate_langs = detect_languages(src_texts)
-              detected_src_lang = candidate_langs[0]
-          else:
-              detected_src_lang = {"confidence": 100.0, "language": source_lang}
-        else:
-          detected_src_lang = {"confidence": 0.0, "language": "en"}
+        try:
+            batch_results, batch_alternatives, detected_src_langs = translate_items(src_texts, source_lang, target_lang, text_format, num_alternatives)
 
-        src_lang = next(iter([l for l in languages if l.code == detected_src_lang["language"]]), None)
+            if batch:
+                result = {"translatedText": batch_results}
 
-        if src_lang is None:
-            abort(400, description=_("%(lang)s is not supported", lang=source_lang))
+                if source_lang == "auto":
+                    result["detectedLanguage"] = model2iso(detected_src_langs)
+                if num_alternatives > 0:
+                    result["alternatives"] = batch_alternatives
+            else:
+                result = {"translatedText": batch_results[0]}
 
-        tgt_lang = next(iter([l for l in languages if l.code == target_lang]), None)
+                if source_lang == "auto":
+                    result["detectedLanguage"] = model2iso(detected_src_langs[0])
+                if num_alternatives > 0:
+                    result["alternatives"] = batch_alternatives[0]
 
-        if tgt_lang is None:
-            abort(400, description=_("%(lang)s is not supported",lang=target_lang))
+            return jsonify(result)
+        except Exception as e:
+            raise e
+            abort(500, description=_("Cannot translate text: %(text)s", text=str(e)))
 
-        if not text_format:
-            text_format = "text"
+    @bp.post("/translate/stream")
+    @access_check
+    def translate_stream():
+        """
+        Translate a stream of texts
+        ---
+        tags:
+          - translate
+        consumes:
+          - application/x-ndjson
+        produces:
+          - application/x-ndjson
+        parameters:
+          - in: query
+            name: source
+            schema:
+              type: string
+              example: en
+            required: true
+            description: Source language code or "auto" for auto detection
+          - in: query
+            name: target
+            schema:
+              type: string
+              example: es
+            required: true
+            description: Target language code
+          - in: query
+            name: format
+            schema:
+              type: string
+              enum: [text, html]
+              default: text
+              example: text
+            required: false
+            description: >
+              Format of source text:
+               * `text` - Plain text
+               * `html` - HTML markup
+          - in: query
+            name: alternatives
+            schema:
+              type: integer
+              example: 3
+            required: false
+            description: Preferred number of alternative translations
+          - in: query
+            name: api_key
+            schema:
+              type: string
+              example: xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx
+            required: false
+            description: API key
+          - in: body
+            name: body
+            schema:
+              type: string
+              example: "\"Hello world!\"\n{\"q\": \"How are you?\", \"id\": 2}\n"
+            required: true
+            description: >
+              One text per line, as a JSON string or a JSON object with a `q`
+              property (and an optional `id`, returned with its translation)
+        responses:
+          200:
+            description: >
+              One translation per line, in the order of the texts, as JSON objects
+              with `translatedText` (and `detectedLanguage`, `alternatives` and `id`
+              when applicable). Translations are sent as each batch completes.
+              If an error occurs, the last line is a JSON object with an `error`
+              property.
+          400:
+            description: Invalid request
+            schema:
+              id: error-response
+              type: object
+              properties:
+                error:
+                  type: string
+                  description: Error message
+          429:
+            description: Slow down
+            schema:
+              id: error-slow-down
+              type: object
+              properties:
+                error:
+                  type: string
+                  description: Reason for slow down
+          403:
+            description: Banned
+            schema:
+              id: error-response
+              type: object
+              properties:
+                error:
+                  type: string
+                  description: Error message
+        """
+        source_lang = iso2model(request.args.get("source"))
+        target_lang = iso2model(request.args.get("target"))
+        text_format = request.args.get("format") or "text"
+        num_alternatives = request.args.get("alternatives", 0)
+
+        if not source_lang:
+            abort(400, description=_("Invalid request: missing %(name)s parameter", name='source'))
+        if not target_lang:
+            abort(400, description=_("Invalid request: missing %(name)s parameter", name='target'))
 
+        try:
+            num_alternatives = max(0, int(num_alternatives))
+        except ValueError:
+            abort(400, description=_("Invalid request: %(name)s parameter is not a number", name='alternatives'))
+
+        if args.alternatives_limit != -1 and num_alternatives > args.alternatives_limit:
+            abort(400, description=_("Invalid request: %(name)s parameter must be <= %(value)s", name='alternatives', value=args.alternatives_limit))
+
+        if source_lang != "auto" and get_language(source_lang) is None:
+            abort(400, description=_("%(lang)s is not supported", lang=source_lang))
+        if get_language(target_lang) is None:
+            abort(400, description=_("%(lang)s is not supported", lang=target_lang))
         if text_format not in ["text", "html"]:
             abort(400, description=_("%(format)s format is not supported", format=text_format))
 
-        try:
-            if batch:
-                batch_results = []
-                batch_alternatives = []
-                for text in q:
-                    translator = src_lang.get_translation(tgt_lang)
-                    if translator is None:
-                        abort(400, description=_("%(tname)s (%(tcode)s) is not available as a target language from %(sname)s (%(scode)s)", tname=_lazy(tgt_lang.name), tcode=tgt_lang.code, sname=_lazy(src_lang.name), scode=src_lang.code))
-
-                    if translatable:
-                      if text_format == "html":
-                          translated_text = unescape(str(translate_html(translator, text)))
-                          alternatives = [] # Not supported for html yet
-                      else:
-                          hypotheses = translator.hypotheses(text, num_alternatives + 1)
-                          translated_text = unescape(improve_translation_formatting(text, hypotheses[0].value))
-                          alternatives = filter_unique([unescape(improve_translation_formatting(text, hypotheses[i].value)) for i in range(1, len(hypotheses))], translated_text)
-                    else:
-                      translated_text = text # Cannot translate, send the original text back
-                      alternatives = []
-
-                    batch_results.append(translated_text)
-                    batch_alternatives.append(alternatives)
+        char_limit = get_char_limit(args.char_limit, api_keys_db)
 
-                result = {"translatedText": batch_results}
+        # The texts are charged against the limits batch by batch
+        request.req_cost = 1
 
-                if source_lang == "auto":
-                    result["detectedLanguage"] = [model2iso(detected_src_lang)] * len(q)
-                if num_alternatives > 0:
-                    result["alternatives"] = batch_alternatives
+        def read_items():
+            for line in request.stream:
+                line = line.strip()
+                if not line:
+                    continue
 
-                return jsonify(result)
-            else:
-                translator = src_lang.get_translation(tgt_lang)
-                if translator is None:
-                    abort(400, description=_("%(tname)s (%(tcode)s) is not available as a target language from %(sname)s (%(scode)s)", tname=_lazy(tgt_lang.name), tcode=tgt_lang.code, sname=_lazy(src_lang.name), scode=src_lang.code))
-
-                if translatable:
-                  if text_format == "html":
-                      translated_text = unescape(str(translate_html(translator, q)))
-                      alternatives = [] # Not supported for html yet
-                  else:
-                      hypotheses = translator.hypotheses(q, num_alternatives + 1)
-                      translated_text = unescape(improve_translation_formatting(q, hypotheses[0].value))
-                      alternatives = filter_unique([unescape(improve_translation_formatting(q, hypotheses[i].value)) for i in range(1, len(hypotheses))], translated_text)
-                else:
-                  translated_text = q # Cannot translate, send the original text back
-                  alternatives = []
+                # Decoded here: json.loads would guess the encoding of bytes
+                item = json.loads(line.decode("utf-8"))
+                if isinstance(item, str):
+                    item = {"q": item}
+                if not isinstance(item, dict) or not isinstance(item.get("q"), str):
+                    abort(400, description=_("Invalid request: missing %(name)s parameter", name='q'))
+                if char_limit != -1 and len(item["q"]) > char_limit:
+                    abort(400, description=_("Invalid request: request (%(size)s) exceeds text limit (%(limit)s)", size=len(item["q"]), limit=char_limit))
+
+                yield item
 
-                result = {"translatedText": translated_text}
+        def translate_batch(items):
+            if not charge_limits(len(items)):
+                abort(429, description=_("Too many requests"))
 
+            src_texts = [item["q"] for item in items]
+            batch_results, batch_alternatives, detected_src_langs = translate_items(src_texts, source_lang, target_lang, text_format, num_alternatives)
+
+            lines = []
+            for i, item in enumerate(items):
+                result = {"translatedText": batch_results[i]}
                 if source_lang == "auto":
-                    result["detectedLanguage"] = model2iso(detected_src_lang)
+                    result["detectedLanguage"] = model2iso(detected_src_langs[i])
                 if num_alternatives > 0:
-                    result["alternatives"] = alternatives
+                    result["alternatives"] = batch_alternatives[i]
+                if "id" in item:
+                    result["id"] = item["id"]
+                lines.append(json.dumps(result, ensure_ascii=False) + "\n")
 
-                return jsonify(result)
-        except Exception as e:
-            raise e
-            abort(500, description=_("Cannot translate text: %(text)s", text=str(e)))
+            return "".join(lines)
+
+        def generate():
+            # The next texts are only read once the client has received the
+            # previous batch, so memory use doesn't depend on the input size
+            items = []
+            try:
+                for item in read_items():
+                    items.append(item)
+                    if len(items) >= engine.MAX_BATCH_SIZE:
+                        yield translate_batch(items)
+                        items = []
+
+                if items:
+                    yield translate_batch(items)
+            except HTTPException as e:
+                error = str(e.description)
+                if e.code == 429:
+                    error = _("Slowdown:") + " " + error
+                yield json.dumps({"error": error}) + "\n"
+            except json.JSONDecodeError:
+                yield json.dumps({"error": _("Invalid JSON format")}) + "\n"
+            except UnicodeDecodeError:
+                # The status is already sent: report it like the other errors
+                yield json.dumps({"error": _("Invalid request: the text must be UTF-8 encoded")}) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
     @bp.post("/translate_s3_file")
-    async def translate_s3_file():
+    def translate_s3_file():
         try:
           if request.is_json:
             json = get_json_dict(request)
-            task = generate_product_translations.apply_async(args=[json['file_key']], priority=4)
-            
-            return jsonify({"task": task.id}), 200
+            key = json['file_key']
+
+            # Optional job spec (columns, targets, ...), which overrides the
+            # spec of the market
+            spec = json.get('spec')
+            if spec is not None:
+                try:
+                    spec = JobSpec.from_dict(spec).to_dict()
+                except ValueError as e:
+                    return jsonify({"message": str(e)}), 400
+
+            if not key.startswith(TRANSLATIONS_PENDING_FOLDER):
+                task = generate_product_translations.apply_async(args=[key], kwargs={"spec": spec}, **get_route(key))
+                return jsonify({"task": task.id}), 200
+
+            # Pending files are also picked up by the scheduled scan: claim
+            # the file first so that it is only translated once
+            tasks = []
+            dispatch = lambda k, options: tasks.append(generate_product_translations.apply_async(args=[k], kwargs={"spec": spec}, **options))
+            if dispatch_file(key, dispatch, get_redis(ext_celery.celery.conf.broker_url)) is None:
+                return jsonify({"message": "File already claimed"}), 409
+
+            return jsonify({"task": tasks[0].id}), 200
         except Exception as e:
           return jsonify({"message": "Internal error"}), 500
 
+    @bp.post("/jobs")
+    @access_check
+    def create_job():
+        """
+        Submit a translation job
+        ---
+        tags:
+          - jobs
+        consumes:
+          - application/json
+          - multipart/form-data
+        parameters:
+          - in: formData
+            name: q
+            schema:
+              oneOf:
+                - type: string
+                  example: Hello world!
+                - type: array
+                  example: ['Hello world!']
+            required: false
+            description: Text(s) to translate (or use file)
+          - in: formData
+            name: file
+            type: file
+            required: false
+            description: File to translate (or use q)
+          - in: formData
+            name: source
+            schema:
+              type: string
+              example: en
+            required: true
+            description: Source language code or "auto" for auto detection
+          - in: formData
+            name: target
+            schema:
+              type: string
+              example: es
+            required: true
+            description: Target language code
+          - in: formData
+            name: format
+            schema:
+              type: string
+              enum: [text, html]
+              default: text
+              example: text
+            required: false
+            description: Format of source text
+          - in: formData
+            name: api_key
+            schema:
+              type: string
+              example: xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx
+            required: false
+            description: API key
+        responses:
+          202:
+            description: Job submitted
+            schema:
+              id: job-submitted
+              type: object
+              properties:
+                id:
+                  type: string
+                  description: Job ID, to get its status from /jobs/{id}
+          400:
+            description: Invalid request
+            schema:
+              id: error-response
+              type: object
+              properties:
+                error:
+                  type: string
+                  description: Error message
+          403:
+            description: Banned
+            schema:
+              id: error-response
+              type: object
+              properties:
+                error:
+                  type: string
+                  description: Error message
+          429:
+            description: Slow down
+            schema:
+              id: error-slow-down
+              type: object
+              properties:
+                error:
+                  type: string
+                  description: Reason for slow down
+        """
+        if request.is_json:
+            json = get_json_dict(request)
+            q = json.get("q")
+            source_lang = iso2model(json.get("source"))
+            target_lang = iso2model(json.get("target"))
+            text_format = json.get("format")
+        else:
+            q = request.values.get("q")
+            source_lang = iso2model(request.values.get("source"))
+            target_lang = iso2model(request.values.get("target"))
+            text_format = request.values.get("format")
+
+        file = request.files.get("file")
+
+        if not q and not file:
+            abort(400, description=_("Invalid request: missing %(name)s parameter", name='q'))
+        if not source_lang:
+            abort(400, description=_("Invalid request: missing %(name)s parameter", name='source'))
+        if not target_lang:
+            abort(400, description=_("Invalid request: missing %(name)s parameter", name='target'))
+
+        if source_lang != "auto" and get_language(source_lang) is None:
+            abort(400, description=_("%(lang)s is not supported", lang=source_lang))
+        if get_language(target_lang) is None:
+            abort(400, description=_("%(lang)s is not supported", lang=target_lang))
+
+        char_limit = get_char_limit(args.char_limit, api_keys_db)
+
+        if file:
+            if args.disable_files_translation:
+                abort(403, description=_("Files translation are disabled on this server."))
+            if file.filename == '':
+                abort(400, description=_("Invalid request: empty file"))
+            if os.path.splitext(file.filename)[1] not in frontend_argos_supported_files_format:
+                abort(400, description=_("Invalid request: file format not supported"))
+
+            # The workers read the file from (and write the translation to)
+            # the upload directory, which must be shared with them
+            filename = str(uuid.uuid4()) + '.' + secure_filename(file.filename)
+            filepath = os.path.join(get_upload_dir(), filename)
+            file.save(filepath)
+
+            if char_limit > 0:
+                request.req_cost = max(1, int(os.path.getsize(filepath) / char_limit))
+
+            task = translate_file_job.apply_async(args=[filepath, source_lang, target_lang])
+        else:
+            src_texts = get_src_texts(q, char_limit)
+
+            if not text_format:
+                text_format = "text"
+            if text_format not in ["text", "html"]:
+                abort(400, description=_("%(format)s format is not supported", format=text_format))
+
+            request.req_cost = max(1, len(src_texts))
+
+            task = translate_texts_job.apply_async(args=[src_texts, source_lang, target_lang, text_format])
+
+        return jsonify({"id": task.id}), 202
+
+    def get_job_status(result):
+        status = {
+            "PENDING": "pending",
+            "SUCCESS": "completed",
+            "FAILURE": "failed",
+            "REVOKED": "failed",
+        }.get(result.state, "running")
+
+        job = {"id": result.id, "status": status}
+
+        info = result.info if isinstance(result.info, dict) else {}
+        if "started" in info:
+            job["progress"] = {k: v for k, v in info.items() if k != "started"}
+
+            elapsed = datetime.now().timestamp() - info["started"]
+            if 0 < info["done"] < info.get("total", 0):
+                job["eta"] = round(elapsed / info["done"] * (info["total"] - info["done"]))
+
+        if status == "completed":
+            job["resultUrl"] = url_for('Main app.get_job_result', job_id=result.id, _external=True)
+        elif status == "failed":
+            job["error"] = str(result.info)
+
+        return job
+
+    @bp.get("/jobs/<string:job_id>")
+    @access_check
+    def get_job(job_id: str):
+        """
+        Get the status of a translation job
+        ---
+        tags:
+          - jobs
+        parameters:
+          - in: path
+            name: job_id
+            type: string
+            required: true
+            description: Job ID
+        responses:
+          200:
+            description: Job status
+            schema:
+              id: job
+              type: object
+              properties:
+                id:
+                  type: string
+                  description: Job ID
+                status:
+                  type: string
+                  enum: [pending, running, completed, failed]
+                  description: Job status
+                progress:
+                  type: object
+                  properties:
+                    done:
+                      type: integer
+                      description: Number of texts (or rows) translated
+                    total:
+                      type: integer
+                      description: Total number of texts (or rows)
+                    chunks:
+                      type: integer
+                      description: Number of chunks translated (CSV files)
+                    column:
+                      type: string
+                      description: Column being translated (CSV files)
+                    rows_per_second:
+                      type: number
+                      description: Rows translated per second (CSV files)
+                    characters_per_second:
+                      type: number
+                      description: Characters translated per second (CSV files)
+                eta:
+                  type: integer
+                  description: Estimated number of seconds until the job completes
+                resultUrl:
+                  type: string
+                  description: URL of the results, once completed
+                error:
+                  type: string
+                  description: Error message, if the job failed
+        """
+        return jsonify(get_job_status(ext_celery.celery.AsyncResult(job_id)))
+
+    @bp.get("/jobs/<string:job_id>/result")
+    @access_check
+    def get_job_result(job_id: str):
+        """
+        Get the results of a completed translation job
+        ---
+        tags:
+          - jobs
+        parameters:
+          - in: path
+            name: job_id
+            type: string
+            required: true
+            description: Job ID
+        responses:
+          200:
+            description: Translated texts (as for /translate) or translated file
+          400:
+            description: The job is not completed
+            schema:
+              id: error-response
+              type: object
+              properties:
+                error:
+                  type: string
+                  description: Error message
+        """
+        result = ext_celery.celery.AsyncResult(job_id)
+        if result.state != "SUCCESS":
+            abort(400, description=_("Job %(id)s is not completed", id=job_id))
+
+        if isinstance(result.result, dict) and "file" in result.result:
+            return download_file(result.result["file"])
+
+        return jsonify(result.result)
+
     @bp.post("/translate_file")
     @access_check
     def translate_file():
@@ -982,12 +1608,12 @@ def create_app(args):
         if os.path.splitext(file.filename)[1] not in frontend_argos_supported_files_format:
             abort(400, description=_("Invalid request: file format not supported"))
 
-        src_lang = next(iter([l for l in languages if l.code == source_lang]), None)
+        src_lang = get_language(source_lang)
 
         if src_lang is None and source_lang != "auto":
             abort(400, description=_("%(lang)s is not supported", lang=source_lang))
 
-        tgt_lang = next(iter([l for l in languages if l.code == target_lang]), None)
+        tgt_lang = get_language(target_lang)
 
         if tgt_lang is None:
             abort(400, description=_("%(lang)s is not supported", lang=target_lang))
@@ -1010,11 +1636,11 @@ def create_app(args):
                 src_texts = argostranslatefiles.get_texts(filepath)
                 candidate_langs = detect_languages(src_texts)
                 detected_src_lang = candidate_langs[0]
-                src_lang = next(iter([l for l in languages if l.code == detected_src_lang["language"]]), None)
+                src_lang = get_language(detected_src_lang["language"])
                 if src_lang is None:
                     abort(400, description=_("%(lang)s is not supported", lang=detected_src_lang["language"]))
 
-            translated_file_path = argostranslatefiles.translate_file(src_lang.get_translation(tgt_lang), filepath)
+            translated_file_path = engine.translate_file(get_translation(src_lang, tgt_lang), filepath)
             translated_filename = os.path.basename(translated_file_path)
 
             return jsonify(
@@ -1067,7 +1693,7 @@ def create_app(args):
               type: string
               example: What language is this?
             required: true
-            description: Text to detect
+            description: Text to detect. With a list of texts, the best detection of each text is returned, in order
           - in: formData
             name: api_key
             schema:
@@ -1141,6 +1767,11 @@ def create_app(args):
         if not q:
             abort(400, description=_("Invalid request: missing %(name)s parameter", name='q'))
 
+        if isinstance(q, list):
+            if not all(isinstance(t, str) for t in q):
+                abort(400, description=_("Invalid request: %(name)s parameter must be a string or a list of strings", name='q'))
+            return jsonify(model2iso(detect_languages(q, per_item=True)))
+
         return jsonify(model2iso(detect_languages(q)))
 
     @bp.route("/frontend/settings")
@@ -0,0 +1,110 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+API_PATHS = ("/translate", "/translate/stream", "/detect", "/languages")
+
+
+class ApiRequest(WsgiToAsgiInstance):
+    """
+    Handles a single API request: the body is read on the event loop and the
+    Flask app (access checks, limits and model work included) runs on the
+    executor, so slow clients and slow translations never block each other.
+    The response is sent as the app produces it (e.g. the lines of
+    /translate/stream), one chunk at a time.
+    """
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+        self.cancelled = False
+
+    async def __call__(self, scope, receive, send):
+        self.scope = scope
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+
+            try:
+                environ = self.build_environ(scope, body)
+            except ValueError:
+                await send({"type": "http.response.start", "status": 400, "headers": [(b"content-type", b"text/plain")]})
+                await send({"type": "http.response.body", "body": b"Bad Request: Too many duplicate headers"})
+                return
+
+            # The app runs (and iterates its response) on a single thread, as
+            # the request context is bound to it. It waits for each chunk to
+            # be taken before producing the next one
+            loop = asyncio.get_running_loop()
+            chunks = asyncio.Queue(maxsize=1)
+            done = loop.run_in_executor(self.executor, self.run_app, environ, loop, chunks)
+
+            started = False
+            try:
+                while True:
+                    chunk = await chunks.get()
+                    if chunk is None:
+                        break
+                    if not started:
+                        await send(self.response_start)
+                        started = True
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            except BaseException:
+                # e.g. the client went away: the app stops at its next chunk
+                self.cancelled = True
+                done.add_done_callback(lambda f: f.cancelled() or f.exception())
+                while not chunks.empty():
+                    chunks.get_nowait()
+                raise
+
+            await done
+
+        if not started:
+            await send(self.response_start)
+        await send({"type": "http.response.body"})
+
+    def run_app(self, environ, loop, chunks):
+        def put(chunk):
+            if self.cancelled:
+                raise ConnectionError("The client is gone")
+            asyncio.run_coroutine_threadsafe(chunks.put(chunk), loop).result()
+
+        try:
+            result = self.wsgi_application(environ, self.start_response)
+            try:
+                for chunk in result:
+                    if chunk:
+                        put(chunk)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        finally:
+            if not self.cancelled:
+                put(None)
+
+
+class AsgiApp:
+    """
+    ASGI entry point. The API routes (API_PATHS) run on a bounded
+    thread pool, so each process serves as many concurrent translations as it
+    has threads while the event loop keeps accepting connections. Any other
+    route (web UI, files, docs) goes through the plain WSGI adapter.
+    """
+    def __init__(self, wsgi_application, threads=4, url_prefix=""):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="libretranslate-asgi")
+        self.fallback = WsgiToAsgi(wsgi_application)
+        self.api_paths = {url_prefix + p for p in API_PATHS}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.api_paths:
+            await ApiRequest(self.wsgi_application, self.executor)(scope, receive, send)
+        else:
+            await self.fallback(scope, receive, send)
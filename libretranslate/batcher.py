@@ -0,0 +1,145 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from timeit import default_timer
+
+from libretranslate import engine
+
+batcher = None
+
+def get_batcher():
+    return batcher
+
+
+class PendingBatch:
+    def __init__(self, translation):
+        self.translation = translation
+        self.requests = []
+        self.size = 0
+        self.since = default_timer()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent translation requests for the same language pair
+    (and format/number of alternatives) into a single model call. A batch is
+    flushed when it reaches max_batch_size texts or when its oldest request
+    has waited max_wait_ms, whichever comes first.
+    """
+    def __init__(self, max_batch_size, max_wait_ms, workers=4):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+
+        self.batches = 0
+        self.texts = 0
+        self.fill_histogram = None
+
+        self.start()
+
+    def start(self):
+        self.pending = {}
+        self.stopped = False
+        self.cond = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def fill_rate(self):
+        if self.batches == 0:
+            return 0.0
+        return self.texts / (self.batches * self.max_batch_size)
+
+    def translate(self, translation, texts, text_format="text", num_alternatives=0):
+        key = (translation.from_lang.code, translation.to_lang.code, text_format, num_alternatives)
+        future = Future()
+
+        with self.cond:
+            if self.stopped:
+                raise Exception("The micro batcher is shut down")
+            batch = self.pending.get(key)
+            if batch is None:
+                batch = self.pending[key] = PendingBatch(translation)
+            batch.requests.append((texts, future))
+            batch.size += len(texts)
+            self.cond.notify()
+
+        return future.result()
+
+    def run(self):
+        while True:
+            with self.cond:
+                now = default_timer()
+                ready = [k for k, b in self.pending.items() if self.stopped or b.size >= self.max_batch_size or now - b.since >= self.max_wait]
+
+                if not ready:
+                    if self.stopped:
+                        return
+
+                    timeout = None
+                    if self.pending:
+                        timeout = max(0, min(b.since + self.max_wait for b in self.pending.values()) - now)
+                    self.cond.wait(timeout)
+                    continue
+
+                flush = [(k, self.pending.pop(k)) for k in ready]
+
+            for key, batch in flush:
+                self.batches += 1
+                self.texts += batch.size
+                if self.fill_histogram is not None:
+                    self.fill_histogram.observe(min(1.0, batch.size / self.max_batch_size))
+
+                self.executor.submit(self.flush, key, batch)
+
+    def shutdown(self):
+        # Flushes the pending requests, then waits for their translations
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+
+        self.thread.join()
+        self.executor.shutdown(wait=True)
+
+    def flush(self, key, batch):
+        text_format, num_alternatives = key[2], key[3]
+        texts = [t for request_texts, f in batch.requests for t in request_texts]
+
+        try:
+            results = engine.translate_texts(batch.translation, texts, text_format, num_alternatives)
+        except Exception as e:
+            for request_texts, future in batch.requests:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for request_texts, future in batch.requests:
+            future.set_result(results[offset:offset + len(request_texts)])
+            offset += len(request_texts)
+
+
+def after_fork():
+    # Threads do not survive a fork (e.g. gunicorn --preload): restart
+    # the dispatcher in the child
+    if batcher is not None:
+        batcher.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=after_fork)
+
+
+def setup(args):
+    global batcher
+
+    if batcher is None and args.micro_batch_size > 0:
+        batcher = MicroBatcher(args.micro_batch_size, args.micro_batch_wait, max(1, args.threads))
+
+        if args.metrics:
+            from prometheus_client import Histogram
+
+            batcher.fill_histogram = Histogram('libretranslate_micro_batch_fill_ratio', 'Texts in each micro batch relative to the maximum batch size',
+                                               buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0))
+
+    return batcher
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from libretranslate import storage
+
+cache = None
+
+def get_cache():
+    return cache
+
+def get_models_version():
+    # Fingerprint of the installed models: when a package is
+    # installed or updated, all previously cached keys stop matching
+    from argostranslate import package
+
+    packages = sorted(f"{p.from_code}-{p.to_code}:{p.package_version}" for p in package.get_installed_packages())
+    return hashlib.sha1(",".join(packages).encode("utf-8")).hexdigest()[:12]
+
+
+class TranslationCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.hits_counter = None
+        self.misses_counter = None
+        self.version = get_models_version()
+
+    def invalidate(self):
+        self.version = get_models_version()
+
+    def key(self, source, target, text_format, num_alternatives, text):
+        h = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        return f"translation:{self.version}:{source}:{target}:{text_format}:{num_alternatives}:{h}"
+
+    def count(self, hits, misses):
+        self.hits += hits
+        self.misses += misses
+        if self.hits_counter is not None:
+            self.hits_counter.inc(hits)
+            self.misses_counter.inc(misses)
+
+    def get_many(self, source, target, text_format, num_alternatives, texts):
+        """
+        Returns a list with a (translated_text, alternatives) tuple
+        for each cached text and None for each miss
+        """
+        keys = [self.key(source, target, text_format, num_alternatives, t) for t in texts]
+        values = self._get_many(keys)
+        misses = sum(1 for v in values if v is None)
+        self.count(len(values) - misses, misses)
+        return values
+
+    def set_many(self, source, target, text_format, num_alternatives, texts, values):
+        self._set_many([(self.key(source, target, text_format, num_alternatives, t), v) for t, v in zip(texts, values)])
+
+    def _get_many(self, keys):
+        raise Exception("not implemented")
+
+    def _set_many(self, items):
+        raise Exception("not implemented")
+
+
+class MemoryCache(TranslationCache):
+    def __init__(self, max_size=10000, ttl=0):
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.store = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _get_many(self, keys):
+        now = time.time()
+        values = []
+        with self.lock:
+            for k in keys:
+                item = self.store.get(k)
+                if item is None:
+                    values.append(None)
+                elif item[1] is not None and item[1] <= now:
+                    del self.store[k]
+                    values.append(None)
+                else:
+                    self.store.move_to_end(k)
+                    values.append(item[0])
+        return values
+
+    def _set_many(self, items):
+        ex = None if self.ttl <= 0 else time.time() + self.ttl
+        with self.lock:
+            for k, v in items:
+                self.store[k] = (v, ex)
+                self.store.move_to_end(k)
+            while len(self.store) > self.max_size:
+                self.store.popitem(last=False)
+
+
+class RedisCache(TranslationCache):
+    def __init__(self, redis_storage, ttl=0):
+        super().__init__()
+        self.conn = redis_storage.conn
+        self.ttl = ttl
+
+    def _get_many(self, keys):
+        return [None if v is None else tuple(json.loads(v)) for v in self.conn.mget(keys)]
+
+    def _set_many(self, items):
+        pipe = self.conn.pipeline(transaction=False)
+        for k, v in items:
+            pipe.set(k, json.dumps(v), ex=self.ttl if self.ttl > 0 else None)
+        pipe.execute()
+
+
+def setup(args):
+    global cache
+
+    cache_uri = args.translation_cache
+    if not cache_uri or cache_uri == "none":
+        cache = None
+    elif cache_uri.startswith("memory://"):
+        cache = MemoryCache(args.translation_cache_size, args.translation_cache_ttl)
+    elif cache_uri.startswith("redis://"):
+        # Reuse the shared storage connection when pointing to the same server
+        s = storage.get_storage()
+        if not isinstance(s, storage.RedisStorage) or cache_uri != args.shared_storage:
+            s = storage.RedisStorage(cache_uri)
+        cache = RedisCache(s, args.translation_cache_ttl)
+    else:
+        raise Exception("Invalid translation cache URI: " + cache_uri)
+
+    if cache is not None and args.metrics:
+        from prometheus_client import Counter
+
+        cache.hits_counter = Counter('libretranslate_translation_cache_hits', 'Translations served from the cache')
+        cache.misses_counter = Counter('libretranslate_translation_cache_misses', 'Translations not found in the cache')
+
+    return cache
+
+def invalidate():
+    if cache is not None:
+        cache.invalidate()
@@ -221,6 +221,61 @@ _default_options_objects = [
         'default_value': False,
         'value_type': 'bool'
     },
+    {
+        'name': 'TRANSLATION_WORKERS',
+        'default_value': 0,
+        'value_type': 'int'
+    },
+    {
+        'name': 'TRANSLATION_WORKER_THREADS',
+        'default_value': 0,
+        'value_type': 'int'
+    },
+    {
+        'name': 'MICRO_BATCH_SIZE',
+        'default_value': 0,
+        'value_type': 'int'
+    },
+    {
+        'name': 'MICRO_BATCH_WAIT',
+        'default_value': 10,
+        'value_type': 'int'
+    },
+    {
+        'name': 'TRANSLATION_CACHE',
+        'default_value': 'memory://',
+        'value_type': 'str'
+    },
+    {
+        'name': 'TRANSLATION_CACHE_SIZE',
+        'default_value': 10000,
+        'value_type': 'int'
+    },
+    {
+        'name': 'TRANSLATION_CACHE_TTL',
+        'default_value': 86400,
+        'value_type': 'int'
+    },
+    {
+        'name': 'MODEL_MEMORY_BUDGET',
+        'default_value': 0,
+        'value_type': 'int'
+    },
+    {
+        'name': 'SEGMENT_CACHE_SIZE',
+        'default_value': 10000,
+        'value_type': 'int'
+    },
+    {
+        'name': 'WARMUP',
+        'default_value': '',
+        'value_type': 'str'
+    },
+    {
+        'name': 'PRELOAD',
+        'default_value': False,
+        'value_type': 'bool'
+    },
     {
         'name': 'METRICS',
         'default_value': False,
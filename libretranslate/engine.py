@@ -0,0 +1,363 @@
+import threading
+from html import unescape
+
+import argostranslatefiles
+from argostranslate import settings
+from argostranslate.translate import (
+    CachedTranslation,
+    CompositeTranslation,
+    Hypothesis,
+    ITranslation,
+    PackageTranslation,
+    apply_packaged_translation,
+)
+from translatehtml import translate_html
+
+from libretranslate import cache, pool, residency, segmentation
+from libretranslate.language import improve_translation_formatting
+
+# Maximum number of sentences sent to CTranslate2 in a single batch.
+# CTranslate2 sorts the inputs by length and splits them in chunks of
+# this size, so similarly sized sentences end up in the same batch.
+MAX_BATCH_SIZE = 64
+
+# CTranslate2 threads per model (0 lets CTranslate2 decide)
+intra_threads = 0
+
+_local = threading.local()
+
+
+def filter_unique(seq, extra):
+    seen = set({extra, ""})
+    seen_add = seen.add
+    return [x for x in seq if not (x in seen or seen_add(x))]
+
+
+def unwrap(translation):
+    if isinstance(translation, CachedTranslation):
+        return translation.underlying
+    return translation
+
+
+def get_pivot(translation):
+    """
+    Returns the two translations (source to pivot, pivot to target) of a
+    translation that goes through a pivot language, or None.
+    """
+    translation = unwrap(translation)
+    if isinstance(translation, CompositeTranslation):
+        return translation.t1, translation.t2
+    return None
+
+
+def get_stanza_pipeline(pkg):
+    # argostranslate builds a new stanza pipeline for every paragraph,
+    # which is far more expensive than the sentence splitting itself.
+    # Keep one per package and per thread (pipelines are not thread safe).
+    pipelines = getattr(_local, "pipelines", None)
+    if pipelines is None:
+        pipelines = _local.pipelines = {}
+
+    key = str(pkg.package_path)
+    if key not in pipelines:
+        import stanza
+
+        pipelines[key] = stanza.Pipeline(
+            lang=pkg.from_code,
+            dir=str(pkg.package_path / "stanza"),
+            processors="tokenize",
+            use_gpu=settings.device == "cuda",
+            logging_level="WARNING",
+        )
+    return pipelines[key]
+
+
+def split_sentences(pkg, paragraph):
+    if pkg.type == "sbd" or not settings.stanza_available:
+        return None
+
+    sentences_cache = segmentation.get_sentences_cache()
+    if sentences_cache is None:
+        return [sentence.text for sentence in get_stanza_pipeline(pkg)(paragraph).sentences]
+
+    # Each package ships its own stanza model, which may split the same
+    # text differently than the model of another package
+    return sentences_cache.get((str(pkg.package_path / "stanza"), paragraph),
+                               lambda: [sentence.text for sentence in get_stanza_pipeline(pkg)(paragraph).sentences])
+
+
+def tokenize(pkg, sentence):
+    tokens_cache = segmentation.get_tokens_cache()
+    if tokens_cache is None:
+        return pkg.tokenizer.encode(sentence)
+
+    # Each model has its own tokenizer
+    return tokens_cache.get((str(pkg.package_path), sentence), lambda: pkg.tokenizer.encode(sentence))
+
+
+def load_model(translation):
+    if translation.translator is None:
+        import ctranslate2
+
+        model_path = str(translation.pkg.package_path / "model")
+        translation.translator = ctranslate2.Translator(model_path, device=settings.device, intra_threads=intra_threads)
+    return translation.translator
+
+
+def load_translator(translation):
+    # With a memory budget, the residency manager decides which
+    # models stay loaded
+    manager = residency.get_manager()
+    if manager is not None:
+        return manager.acquire(translation, load_model)
+    return load_model(translation)
+
+
+def get_package_translations(translation):
+    translation = unwrap(translation)
+    if isinstance(translation, CompositeTranslation):
+        return get_package_translations(translation.t1) + get_package_translations(translation.t2)
+    if isinstance(translation, PackageTranslation):
+        return [translation]
+    return []
+
+
+def translate_packaged(translation, texts, num_hypotheses):
+    pkg = translation.pkg
+    translator = load_translator(translation)
+
+    # Flatten all texts into sentences, remembering where each one came from
+    paragraphs = [ITranslation.split_into_paragraphs(text) for text in texts]
+    tokenized = []
+    spans = []
+    fallback = {}
+    for i, text_paragraphs in enumerate(paragraphs):
+        text_spans = []
+        for j, paragraph in enumerate(text_paragraphs):
+            sentences = split_sentences(pkg, paragraph)
+            if sentences is None:
+                # No stanza available, let argostranslate handle sentence
+                # boundary detection for this paragraph
+                fallback[(i, j)] = apply_packaged_translation(pkg, paragraph, translator, num_hypotheses)
+                text_spans.append(None)
+                continue
+
+            start = len(tokenized)
+            tokenized.extend(tokenize(pkg, sentence) for sentence in sentences)
+            text_spans.append((start, len(tokenized)))
+        spans.append(text_spans)
+
+    results = []
+    if tokenized:
+        target_prefix = None
+        if pkg.target_prefix != "":
+            target_prefix = [[pkg.target_prefix]] * len(tokenized)
+
+        results = translator.translate_batch(
+            tokenized,
+            target_prefix=target_prefix,
+            replace_unknowns=True,
+            max_batch_size=MAX_BATCH_SIZE,
+            beam_size=max(num_hypotheses, 4),
+            num_hypotheses=num_hypotheses,
+            length_penalty=0.2,
+            return_scores=True,
+        )
+
+    # Map the sentences back to paragraphs and texts
+    batch_hypotheses = []
+    for i, text_spans in enumerate(spans):
+        translated_paragraphs = []
+        for j, span in enumerate(text_spans):
+            if span is None:
+                translated_paragraphs.append(fallback[(i, j)])
+                continue
+
+            start, end = span
+            paragraph_hypotheses = []
+            for h in range(num_hypotheses):
+                translated_tokens = []
+                cumulative_score = 0
+                for result in results[start:end]:
+                    translated_tokens += result.hypotheses[h]
+                    cumulative_score += result.scores[h]
+
+                value = pkg.tokenizer.decode(translated_tokens)
+                if pkg.target_prefix != "" and value.startswith(pkg.target_prefix):
+                    value = value[len(pkg.target_prefix):]
+                if len(value) > 0 and value[0] == " ":
+                    value = value[1:]
+
+                paragraph_hypotheses.append(Hypothesis(value, cumulative_score))
+            translated_paragraphs.append(paragraph_hypotheses)
+
+        batch_hypotheses.append([
+            Hypothesis(
+                ITranslation.combine_paragraphs([p[h].value for p in translated_paragraphs]).lstrip("\n"),
+                sum(p[h].score for p in translated_paragraphs),
+            )
+            for h in range(num_hypotheses)
+        ])
+
+    return batch_hypotheses
+
+
+def translate_composite(translation, texts, num_hypotheses):
+    t1_hypotheses = translate_batch(translation.t1, texts, num_hypotheses)
+
+    # Send every intermediate hypothesis through the second model in one batch
+    intermediate = [h.value for hypotheses in t1_hypotheses for h in hypotheses]
+    t2_hypotheses = translate_batch(translation.t2, intermediate, num_hypotheses)
+
+    batch_hypotheses = []
+    offset = 0
+    for hypotheses in t1_hypotheses:
+        combined = []
+        for t1_hypothesis in hypotheses:
+            for t2_hypothesis in t2_hypotheses[offset]:
+                combined.append(Hypothesis(t2_hypothesis.value, t1_hypothesis.score + t2_hypothesis.score))
+            offset += 1
+        combined.sort(reverse=True)
+        batch_hypotheses.append(combined[0:num_hypotheses])
+
+    return batch_hypotheses
+
+
+def translate_batch(translation, texts, num_hypotheses=1):
+    """
+    Translate a list of texts with a single pass through the model(s).
+    Returns a list with num_hypotheses hypotheses for each text, in the same
+    order as texts and with the same values that translation.hypotheses would return.
+    """
+    if not texts:
+        return []
+
+    translation = unwrap(translation)
+
+    if isinstance(translation, PackageTranslation):
+        return translate_packaged(translation, texts, num_hypotheses)
+    elif isinstance(translation, CompositeTranslation):
+        return translate_composite(translation, texts, num_hypotheses)
+    else:
+        # Identity, remote or few-shot translations have no batch interface
+        return [translation.hypotheses(text, num_hypotheses) for text in texts]
+
+
+class BatchedTranslation(ITranslation):
+    """
+    Runs the translations of argostranslate callers (e.g. translatehtml)
+    through translate_batch, and so through the preprocessing caches.
+    """
+    def __init__(self, translation):
+        self.underlying = translation
+        self.from_lang = translation.from_lang
+        self.to_lang = translation.to_lang
+
+    def hypotheses(self, input_text, num_hypotheses=4):
+        return translate_batch(self.underlying, [input_text], num_hypotheses)[0]
+
+
+def translate_file(translation, filepath):
+    """
+    Translates a document with argostranslatefiles. Its texts go through
+    translate_batch, so the models are loaded (and evicted) by load_translator
+    like those of the other translations.
+    """
+    return argostranslatefiles.translate_file(BatchedTranslation(translation), filepath)
+
+
+def translate_missing(translation, texts, text_format="text", num_alternatives=0):
+    if text_format == "html":
+        # translatehtml goes through argostranslate, which loads the models
+        # by itself: load them here so that they are accounted for
+        for t in get_package_translations(translation):
+            load_translator(t)
+        batched = BatchedTranslation(translation)
+        return [(unescape(str(translate_html(batched, text))), []) for text in texts] # No alternatives for html yet
+
+    translated = []
+    for text, hypotheses in zip(texts, translate_batch(translation, texts, num_alternatives + 1)):
+        translated_text = unescape(improve_translation_formatting(text, hypotheses[0].value))
+        alternatives = filter_unique([unescape(improve_translation_formatting(text, hypotheses[i].value)) for i in range(1, len(hypotheses))], translated_text)
+        translated.append((translated_text, alternatives))
+    return translated
+
+
+def translate_raw(translation, texts):
+    """
+    Returns the best hypothesis of each text as the model outputs it,
+    without formatting, unescaping nor caching (the way a composite
+    translation passes it to its second model).
+    """
+    if not texts:
+        return []
+
+    translation_pool = pool.get_pool()
+    if translation_pool is not None:
+        return translation_pool.translate_raw(translation.from_lang.code, translation.to_lang.code, texts)
+    return [hypotheses[0].value for hypotheses in translate_batch(translation, texts, 1)]
+
+
+def translate_pivoted(translation, texts, intermediate):
+    """
+    Finishes a composite translation of texts (as plain text, without
+    alternatives) whose first step is already done: intermediate is the
+    translate_raw output of its first model. Returns the same results as
+    translate_texts, and caches them the same way.
+    """
+    translation_cache = cache.get_cache()
+    source = translation.from_lang.code
+    target = translation.to_lang.code
+
+    if translation_cache is not None:
+        results = translation_cache.get_many(source, target, "text", 0, texts)
+    else:
+        results = [None] * len(texts)
+
+    # Only the texts that are not cached go through the second model
+    missing = list(dict.fromkeys((t, i) for t, i, r in zip(texts, intermediate, results) if r is None))
+    if not missing:
+        return results
+
+    values = translate_raw(get_pivot(translation)[1], [i for t, i in missing])
+    translated = [(unescape(improve_translation_formatting(t, value)), []) for (t, i), value in zip(missing, values)]
+
+    if translation_cache is not None:
+        translation_cache.set_many(source, target, "text", 0, [t for t, i in missing], translated)
+
+    translated = dict(zip([t for t, i in missing], translated))
+    return [translated[t] if r is None else r for t, r in zip(texts, results)]
+
+
+def translate_texts(translation, texts, text_format="text", num_alternatives=0):
+    """
+    Translate texts the way the API returns them. Returns a list
+    of (translated_text, alternatives) tuples, one for each text.
+    Results are looked up in the translation cache first and each
+    missing text is translated only once, by the translation pool
+    when one is running.
+    """
+    translation_cache = cache.get_cache()
+    source = translation.from_lang.code
+    target = translation.to_lang.code
+
+    if translation_cache is not None:
+        results = translation_cache.get_many(source, target, text_format, num_alternatives, texts)
+    else:
+        results = [None] * len(texts)
+
+    missing = list(dict.fromkeys(t for t, r in zip(texts, results) if r is None))
+    if not missing:
+        return results
+
+    translation_pool = pool.get_pool()
+    if translation_pool is not None:
+        translated = translation_pool.translate(source, target, missing, text_format, num_alternatives)
+    else:
+        translated = translate_missing(translation, missing, text_format, num_alternatives)
+
+    if translation_cache is not None:
+        translation_cache.set_many(source, target, text_format, num_alternatives, missing, translated)
+
+    translated = dict(zip(missing, translated))
+    return [translated[t] if r is None else r for t, r in zip(texts, results)]
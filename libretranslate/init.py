@@ -2,6 +2,7 @@
 from argostranslate import package, translate
 from packaging import version
 
+import libretranslate.cache
 import libretranslate.language
 
 
@@ -71,6 +72,9 @@ def check_and_install_models(force=False, load_only_lang_codes=None,update=False
 
         # reload installed languages
         libretranslate.language.languages = translate.get_installed_languages()
+
+        # cached translations from previous model versions must not be served
+        libretranslate.cache.invalidate()
         print(
             f"Loaded support for {len(translate.get_installed_languages())} languages ({len(available_packages)} models total)!"
         )
@@ -2,19 +2,21 @@ import boto3
 
 
 class AWSClient:
-    def __init__(self, aws_access_key_id, aws_secret_access_key, aws_region):
+    def __init__(self, aws_access_key_id, aws_secret_access_key, aws_region, endpoint_url=None):
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
         self.aws_region = aws_region
+        # Set to use a S3 compatible service instead of AWS (e.g. MinIO or moto)
+        self.endpoint_url = endpoint_url
 
-    def get_client(self, service_name):
+    def get_client(self, service_name, config=None):
         try:
             session = boto3.Session(
                 aws_access_key_id=self.aws_access_key_id,
                 aws_secret_access_key=self.aws_secret_access_key,
                 region_name=self.aws_region
             )
-            client = session.client(service_name)
+            client = session.client(service_name, endpoint_url=self.endpoint_url, config=config)
             return client
         except Exception as e:
             return None
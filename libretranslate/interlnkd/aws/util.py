@@ -1,24 +1,86 @@
+import asyncio
 import os
+import threading
+
 import botocore
+from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
+from smart_open import open as smart_open
+
 from .client import AWSClient
-from ..constants import AWS_ACCESS_KEY_ID, AWS_REGION, AWS_SECRET_ACCESS_KEY
+from ..constants import (
+    AWS_ACCESS_KEY_ID,
+    AWS_REGION,
+    AWS_S3_ENDPOINT_URL,
+    AWS_S3_MAX_POOL_CONNECTIONS,
+    AWS_S3_MULTIPART_CHUNKSIZE,
+    AWS_S3_TRANSFER_CONCURRENCY,
+    AWS_SECRET_ACCESS_KEY,
+    INTERLNKD_LOVELACE_PRIVATE,
+)
 
 from botocore.exceptions import ClientError
 
-def get_s3_client():
+# Multipart uploads and downloads of large files, in parallel parts
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=AWS_S3_MULTIPART_CHUNKSIZE,
+    multipart_chunksize=AWS_S3_MULTIPART_CHUNKSIZE,
+    max_concurrency=AWS_S3_TRANSFER_CONCURRENCY,
+    use_threads=True,
+)
+
+s3_client = None
+s3_client_pid = None
+s3_client_lock = threading.Lock()
+
+
+def create_s3_client():
     aws_client = AWSClient(
         AWS_ACCESS_KEY_ID,
         AWS_SECRET_ACCESS_KEY,
-        AWS_REGION
+        AWS_REGION,
+        endpoint_url=AWS_S3_ENDPOINT_URL
+    )
+    # The pool must hold a connection for each thread using the client
+    # (translation threads, scans, transfer threads)
+    config = Config(
+        max_pool_connections=AWS_S3_MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": 5, "mode": "adaptive"},
+        tcp_keepalive=True,
     )
-    s3_client = aws_client.get_client("s3")
+    return aws_client.get_client("s3", config=config)
+
+
+def get_s3_client():
+    """
+    Returns the S3 client of the process. boto3 clients are thread safe,
+    so a single client (and its connection pool) is shared by all the
+    threads; a forked process creates its own.
+    """
+    global s3_client, s3_client_pid
+
+    with s3_client_lock:
+        if s3_client is None or s3_client_pid != os.getpid():
+            s3_client = create_s3_client()
+            s3_client_pid = os.getpid()
+
     return s3_client
 
 
+async def s3_call(method, **kwargs):
+    """Runs a S3 client method in a thread, without blocking the event loop"""
+    return await asyncio.to_thread(getattr(get_s3_client(), method), **kwargs)
+
+
+def open_s3_file(key, mode='rb', **transport_params):
+    """Opens a file of the bucket as a stream (with smart_open), using the process' S3 client"""
+    return smart_open(f"s3://{INTERLNKD_LOVELACE_PRIVATE}/{key}", mode, transport_params={"client": get_s3_client(), **transport_params})
+
+
 def dowload_s3_file(bucket_name, object_key, download_path):
     try:
         s3_client = get_s3_client()
-        s3_client.download_file(bucket_name, object_key, download_path)
+        s3_client.download_file(bucket_name, object_key, download_path, Config=TRANSFER_CONFIG)
 
         if os.path.exists(download_path):
             return download_path
@@ -50,9 +112,8 @@ def scan_s3_folder(bucket_name, folder):
 
 async def upload_to_s3(file_path, bucket, s3_key):
     try:
-        s3_client = get_s3_client()
         print('upload_to_s3', flush=True)
-        print(s3_client.upload_file(file_path, bucket, s3_key), flush=True)
+        await s3_call('upload_file', Filename=file_path, Bucket=bucket, Key=s3_key, Config=TRANSFER_CONFIG)
     except Exception as e:
         print(e, flush=True)
         return None
@@ -1,8 +1,31 @@
 from celery import current_app as current_celery_app
+from kombu import Queue
+
+from .constants import TRANSLATIONS_QUEUE_LARGE, TRANSLATIONS_QUEUE_SMALL, TRANSLATIONS_SCAN_INTERVAL
 
 
 def make_celery(app):
     celery = current_celery_app
     celery.config_from_object(app.config, namespace="CELERY")
 
-    return celery
\ No newline at end of file
+    celery.conf.update(
+        task_default_queue="celery",
+        task_queues=(Queue("celery"), Queue(TRANSLATIONS_QUEUE_SMALL), Queue(TRANSLATIONS_QUEUE_LARGE)),
+        # Redis emulates priorities with one list per priority step
+        broker_transport_options={"priority_steps": list(range(10)), "sep": ":"},
+        # A worker reserves one task at a time, so the tasks waiting in the
+        # queues can still be reordered by priority or taken by idle workers
+        worker_prefetch_multiplier=1,
+    )
+
+    if TRANSLATIONS_SCAN_INTERVAL > 0:
+        celery.conf.beat_schedule = {
+            "scan-pending-translations": {
+                "task": "libretranslate.interlnkd.translations.tasks.scan_pending_translations",
+                "schedule": TRANSLATIONS_SCAN_INTERVAL,
+                # Scans that could not run in time are dropped, not piled up
+                "options": {"expires": TRANSLATIONS_SCAN_INTERVAL},
+            },
+        }
+
+    return celery
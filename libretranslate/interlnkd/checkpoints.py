@@ -0,0 +1,100 @@
+import hashlib
+import os
+
+from .aws.util import get_s3_client
+from .constants import INTERLNKD_LOVELACE_PRIVATE, TRANSLATIONS_CHECKPOINT_DIR, TRANSLATIONS_CHECKPOINTS_FOLDER
+
+
+def chunk_name(index, extension="csv"):
+    # Chunk names are deterministic so that a retried chunk overwrites its
+    # previous (partial) attempt instead of adding a new checkpoint
+    return f"chunk-{index:06d}.{extension}"
+
+
+def get_job_id(key, chunk_rows, version="", spec=""):
+    """
+    Identifies a translation job. The same file (same key and version, e.g.
+    its S3 ETag) split in the same chunks and translated with the same spec
+    always maps to the same job, so a retried task finds the checkpoints of
+    the previous attempt.
+    """
+    return hashlib.sha1(f"{key}:{version}:{chunk_rows}:{spec}".encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """Checkpoints are bytes; text (e.g. CSV) is stored as UTF-8"""
+    def list(self):
+        raise Exception("not implemented")
+
+    def read(self, name):
+        return self.read_bytes(name).decode('utf-8')
+
+    def read_bytes(self, name):
+        raise Exception("not implemented")
+
+    def write(self, name, data):
+        raise Exception("not implemented")
+
+    def clear(self):
+        raise Exception("not implemented")
+
+
+class S3CheckpointStore(CheckpointStore):
+    def __init__(self, job_id, bucket=INTERLNKD_LOVELACE_PRIVATE, folder=TRANSLATIONS_CHECKPOINTS_FOLDER):
+        self.bucket = bucket
+        self.prefix = f"{folder}{job_id}/"
+        self.s3_client = get_s3_client()
+
+    def list(self):
+        names = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get('Contents', []):
+                names.append(obj['Key'][len(self.prefix):])
+        return sorted(names)
+
+    def read_bytes(self, name):
+        return self.s3_client.get_object(Bucket=self.bucket, Key=self.prefix + name)['Body'].read()
+
+    def write(self, name, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.s3_client.put_object(Bucket=self.bucket, Key=self.prefix + name, Body=data)
+
+    def clear(self):
+        for name in self.list():
+            self.s3_client.delete_object(Bucket=self.bucket, Key=self.prefix + name)
+
+
+class LocalCheckpointStore(CheckpointStore):
+    def __init__(self, job_id, directory):
+        self.directory = os.path.join(directory, job_id)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def list(self):
+        return sorted(n for n in os.listdir(self.directory) if not n.endswith(".tmp"))
+
+    def read_bytes(self, name):
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            return f.read()
+
+    def write(self, name, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        # Write then rename, so that a crash never leaves a partial checkpoint
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", 'wb') as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+
+def get_checkpoint_store(job_id):
+    if TRANSLATIONS_CHECKPOINT_DIR:
+        return LocalCheckpointStore(job_id, TRANSLATIONS_CHECKPOINT_DIR)
+    return S3CheckpointStore(job_id)
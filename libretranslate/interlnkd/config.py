@@ -22,7 +22,18 @@ class ProductionConfig(BaseConfig):
     DEBUG = False
 
 
+class TestingConfig(BaseConfig):
+    """Testing configuration: tasks run in the process, without Redis"""
+    TESTING = True
+
+    CELERY_BROKER_URL = "memory://"
+    CELERY_RESULT_BACKEND = "cache+memory://"
+    CELERY_TASK_ALWAYS_EAGER = True
+    CELERY_TASK_STORE_EAGER_RESULT = True
+
+
 config = {
     "development": DevelopmentConfig,
     "production": ProductionConfig,
+    "testing": TestingConfig,
 }
\ No newline at end of file
@@ -7,14 +7,66 @@ load_dotenv()
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_REGION = os.environ.get('AWS_REGION')
 AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
+# Use a S3 compatible service instead of AWS (e.g. http://minio:9000)
+AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL') or None
+# HTTP connections kept open by the S3 client of each process
+AWS_S3_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_S3_MAX_POOL_CONNECTIONS', 50))
+# Parts uploaded or downloaded in parallel by a S3 transfer, and their size
+AWS_S3_TRANSFER_CONCURRENCY = int(os.environ.get('AWS_S3_TRANSFER_CONCURRENCY', 10))
+AWS_S3_MULTIPART_CHUNKSIZE = int(os.environ.get('AWS_S3_MULTIPART_CHUNKSIZE', 16 * 1024 * 1024))
 INTERLNKD_LOVELACE_PRIVATE = "interlnkd-lovelace-private"
 FAILED_FOLDER = f'production/products/translations/failed/'
 TRANSLATIONS_PENDING_FOLDER = f'production/products/translations/pending/'
+TRANSLATIONS_PROCESSING_FOLDER = f'production/products/translations/processing/'
 TRANSLATIONS_COMPLETED_FOLDER = f'production/products/translations/completed/'
+TRANSLATIONS_CHECKPOINTS_FOLDER = f'production/products/translations/checkpoints/'
 
-S3_URL = f's3://{AWS_ACCESS_KEY_ID}:{AWS_SECRET_ACCESS_KEY}@{INTERLNKD_LOVELACE_PRIVATE}/'
 COLUMNS_TO_CHECK = [
     "product_name",
     "description",
     "raw_category",
-]
\ No newline at end of file
+]
+
+# Columns translated to English, and the columns their translations are written to
+TRANSLATION_COLUMNS = {
+    "product_name": "product_name_en",
+    "description": "description_en",
+}
+
+# Job spec of a market (see jobspec.py), read from its pending folder
+TRANSLATIONS_SPEC_FILE = os.environ.get('TRANSLATIONS_SPEC_FILE', 'spec.json')
+
+# Rows read and translated at a time when streaming CSV files (0 reads the whole file)
+CSV_CHUNK_ROWS = int(os.environ.get('TRANSLATIONS_CSV_CHUNK_ROWS', 10000))
+# Size of each part of the multipart upload of translated files
+CSV_UPLOAD_PART_SIZE = int(os.environ.get('TRANSLATIONS_CSV_UPLOAD_PART_SIZE', 50 * 1024 * 1024))
+# Keep chunk checkpoints in this local directory instead of S3 (for development and tests)
+TRANSLATIONS_CHECKPOINT_DIR = os.environ.get('TRANSLATIONS_CHECKPOINT_DIR')
+# Number of times a failed translation task is retried (resuming from its checkpoints)
+TRANSLATIONS_MAX_RETRIES = int(os.environ.get('TRANSLATIONS_MAX_RETRIES', 3))
+# Chunks translated concurrently by each task when no translation pool is running
+TRANSLATION_THREADS = int(os.environ.get('TRANSLATION_THREADS', 5))
+# Serve the Prometheus metrics of the celery workers on this port (0 disables it)
+TRANSLATIONS_METRICS_PORT = int(os.environ.get('TRANSLATIONS_METRICS_PORT', 0))
+
+# Translation tasks go to a queue by file size, so small files are never stuck behind large ones
+TRANSLATIONS_QUEUE_SMALL = os.environ.get('TRANSLATIONS_QUEUE_SMALL', 'translations-small')
+TRANSLATIONS_QUEUE_LARGE = os.environ.get('TRANSLATIONS_QUEUE_LARGE', 'translations-large')
+# Files larger than this (in bytes) go to the large files queue
+TRANSLATIONS_LARGE_FILE_BYTES = int(os.environ.get('TRANSLATIONS_LARGE_FILE_BYTES', 20 * 1024 * 1024))
+# Maximum number of files of the same market translated at the same time (0 for no limit)
+TRANSLATIONS_MARKET_CONCURRENCY = int(os.environ.get('TRANSLATIONS_MARKET_CONCURRENCY', 0))
+# A running task holds its market slot for this many seconds after its last progress
+TRANSLATIONS_MARKET_LEASE = int(os.environ.get('TRANSLATIONS_MARKET_LEASE', 3600))
+# Delay (in seconds) before a task waiting for a market slot tries again
+TRANSLATIONS_MARKET_RETRY_DELAY = int(os.environ.get('TRANSLATIONS_MARKET_RETRY_DELAY', 30))
+
+# Scan the pending folder for new files every this many seconds (0 disables the scan)
+TRANSLATIONS_SCAN_INTERVAL = int(os.environ.get('TRANSLATIONS_SCAN_INTERVAL', 60))
+# Pending files claimed and dispatched at the same time by a scan
+TRANSLATIONS_SCAN_CONCURRENCY = int(os.environ.get('TRANSLATIONS_SCAN_CONCURRENCY', 8))
+# A scan's claim on a pending file expires after this many seconds
+TRANSLATIONS_CLAIM_TTL = int(os.environ.get('TRANSLATIONS_CLAIM_TTL', 600))
+# Once dispatched, a file's claim lasts this many seconds after the last progress of its
+# task; the scan moves the processing files whose claim expired back to the pending folder
+TRANSLATIONS_PROCESSING_LEASE = int(os.environ.get('TRANSLATIONS_PROCESSING_LEASE', 6 * 3600))
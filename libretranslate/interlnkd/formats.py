@@ -0,0 +1,213 @@
+import io
+import os
+
+import pandas as pd
+
+
+class FileFormat:
+    """
+    Reads the input file of a translation job in chunks of rows and writes
+    the output file from the translated chunks (checkpointed in between).
+    """
+    extensions = ()
+    checkpoint_extension = ""
+
+    def read_header(self, f):
+        raise Exception("not implemented")
+
+    def read_chunks(self, f, chunk_rows, columns):
+        """
+        Yields DataFrames of at most chunk_rows rows (the whole file when
+        chunk_rows <= 0), with the columns to translate. Formats that can
+        may skip the other columns.
+        """
+        raise Exception("not implemented")
+
+    def serialize_chunk(self, df, index, target_columns):
+        raise Exception("not implemented")
+
+    def write(self, f, out, chunks, chunk_rows):
+        """
+        Writes the output file: chunks is the list of the serialized
+        translated chunks, in order.
+        """
+        raise Exception("not implemented")
+
+
+class CsvFormat(FileFormat):
+    extensions = (".csv",)
+    checkpoint_extension = "csv"
+
+    def read_header(self, f):
+        return pd.read_csv(f, nrows=0).columns.tolist()
+
+    def read_chunks(self, f, chunk_rows, columns):
+        # Rows are written back whole, so all the columns are read, as
+        # strings so that chunks serialize consistently
+        if chunk_rows <= 0:
+            yield pd.read_csv(f, dtype=str)
+        else:
+            yield from pd.read_csv(f, dtype=str, chunksize=chunk_rows)
+
+    def serialize_chunk(self, df, index, target_columns):
+        return df.to_csv(index=False, header=(index == 0)).encode("utf-8")
+
+    def write(self, f, out, chunks, chunk_rows):
+        # The checkpoints are already CSV (the first one with the header)
+        for data in chunks:
+            out.write(data)
+
+
+def rebatch(batches, chunk_rows):
+    # Regroups Arrow record batches into tables of exactly chunk_rows rows
+    # (but the last), so that chunk i always holds the same rows
+    import pyarrow as pa
+
+    pending = []
+    rows = 0
+    for batch in batches:
+        pending.append(batch)
+        rows += batch.num_rows
+
+        while chunk_rows > 0 and rows >= chunk_rows:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_rows)
+            rest = table.slice(chunk_rows)
+            pending = rest.to_batches()
+            rows = rest.num_rows
+
+    if rows > 0:
+        yield pa.Table.from_batches(pending)
+
+
+class ColumnarFormat(FileFormat):
+    """
+    Parquet and Arrow files are columnar: only the columns to translate are
+    read, and only the translated columns are checkpointed (as Arrow IPC).
+    The output is the input with the translated columns appended; the other
+    columns go from the reader to the writer as Arrow data, without being
+    converted to Python objects.
+    """
+    checkpoint_extension = "arrow"
+
+    def read_header(self, f):
+        return self.get_schema(f).names
+
+    def read_chunks(self, f, chunk_rows, columns):
+        columns = [c for c in columns if c in self.get_schema(f).names]
+        for table in rebatch(self.read_batches(f, columns), chunk_rows):
+            # As plain Python strings, like the CSV reader (not categoricals
+            # for dictionary encoded columns)
+            yield table.to_pandas().astype(object)
+
+    def serialize_chunk(self, df, index, target_columns):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df[target_columns].astype(str), preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+
+    def write(self, f, out, chunks, chunk_rows):
+        import pyarrow as pa
+
+        chunks = iter(chunks)
+        writer = None
+        try:
+            for table in rebatch(self.read_batches(f, None), chunk_rows):
+                data = next(chunks, None)
+                if data is None:
+                    raise ValueError("Missing translated chunks")
+
+                translated = pa.ipc.open_stream(data).read_all()
+                if translated.num_rows != table.num_rows:
+                    raise ValueError(f"Checkpoint has {translated.num_rows} rows, expected {table.num_rows}")
+
+                for name, column in zip(translated.column_names, translated.columns):
+                    table = table.append_column(name, column)
+
+                if writer is None:
+                    writer = self.open_writer(out, table.schema)
+                writer.write_table(table)
+
+            if next(chunks, None) is not None:
+                raise ValueError("More translated chunks than input chunks")
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def get_schema(self, f):
+        raise Exception("not implemented")
+
+    def read_batches(self, f, columns):
+        raise Exception("not implemented")
+
+    def open_writer(self, out, schema):
+        raise Exception("not implemented")
+
+
+class ParquetFormat(ColumnarFormat):
+    extensions = (".parquet", ".pq")
+
+    def get_schema(self, f):
+        import pyarrow.parquet as pq
+
+        f.seek(0)
+        return pq.ParquetFile(f).schema_arrow
+
+    def read_batches(self, f, columns):
+        import pyarrow.parquet as pq
+
+        f.seek(0)
+        return pq.ParquetFile(f).iter_batches(columns=columns)
+
+    def open_writer(self, out, schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(out, schema)
+
+
+class ArrowFormat(ColumnarFormat):
+    extensions = (".arrow", ".feather", ".ipc")
+
+    def get_schema(self, f):
+        import pyarrow as pa
+
+        f.seek(0)
+        return pa.ipc.open_file(f).schema
+
+    def read_batches(self, f, columns):
+        import pyarrow as pa
+
+        f.seek(0)
+        options = pa.ipc.IpcReadOptions()
+        if columns is not None:
+            # Only the buffers of these columns are read
+            schema = pa.ipc.open_file(f).schema
+            options = pa.ipc.IpcReadOptions(included_fields=[schema.get_field_index(c) for c in columns])
+            f.seek(0)
+
+        reader = pa.ipc.open_file(f, options=options)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+    def open_writer(self, out, schema):
+        import pyarrow as pa
+
+        return pa.ipc.new_file(out, schema)
+
+
+FORMATS = [CsvFormat(), ParquetFormat(), ArrowFormat()]
+
+
+def get_file_format(file_name):
+    _, file_extension = os.path.splitext(file_name)
+    for file_format in FORMATS:
+        if file_extension.lower() in file_format.extensions:
+            return file_format
+    return None
+
+
+def is_supported_file(file_name):
+    return get_file_format(file_name) is not None
@@ -0,0 +1,55 @@
+import os
+import time
+
+import argostranslatefiles
+from celery import shared_task
+
+from libretranslate import engine
+from libretranslate.language import detect_languages, get_language, get_translation
+from ..translations.tasks import setup_worker
+from ..utils import translate_batch
+
+
+def report_progress(task, done, total, started):
+    # Stored in the result backend, read by GET /jobs/<id>
+    task.update_state(state="PROGRESS", meta={"done": done, "total": total, "started": started})
+
+
+@shared_task(bind=True)
+def translate_texts_job(self, texts, source, target, text_format="text"):
+    started = time.time()
+    setup_worker()
+
+    results = []
+    report_progress(self, 0, len(texts), started)
+
+    for i in range(0, len(texts), engine.MAX_BATCH_SIZE):
+        chunk = texts[i:i + engine.MAX_BATCH_SIZE]
+        result = translate_batch({"q": chunk, "source": source, "target": target, "format": text_format})
+        results.extend(result["translatedText"])
+        report_progress(self, len(results), len(texts), started)
+
+    return {"translatedText": results}
+
+
+@shared_task(bind=True)
+def translate_file_job(self, filepath, source, target):
+    started = time.time()
+    setup_worker()
+
+    report_progress(self, 0, 1, started)
+
+    if source == "auto":
+        source = detect_languages(argostranslatefiles.get_texts(filepath))[0]["language"]
+
+    src_lang = get_language(source)
+    tgt_lang = get_language(target)
+    if src_lang is None:
+        raise ValueError(f"{source} is not supported")
+    if tgt_lang is None:
+        raise ValueError(f"{target} is not supported")
+
+    translated_file_path = engine.translate_file(get_translation(src_lang, tgt_lang), filepath)
+    report_progress(self, 1, 1, started)
+
+    return {"file": os.path.basename(translated_file_path)}
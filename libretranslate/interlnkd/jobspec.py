@@ -0,0 +1,122 @@
+import json
+
+from botocore.exceptions import ClientError
+
+from .aws.util import get_s3_client
+from .constants import (
+    COLUMNS_TO_CHECK,
+    CSV_CHUNK_ROWS,
+    INTERLNKD_LOVELACE_PRIVATE,
+    TRANSLATION_COLUMNS,
+    TRANSLATIONS_PENDING_FOLDER,
+    TRANSLATIONS_SPEC_FILE,
+)
+
+
+class JobSpec:
+    """
+    Describes what a product translation job translates: the columns, the
+    target languages, the chunk sizes, whether the values are deduplicated
+    and the maximum length of the texts sent to the models (per column).
+    The translation of column c to language t is written to the c_t column.
+    """
+    def __init__(self, columns=None, targets=None, chunk_rows=CSV_CHUNK_ROWS, batch_size=500, dedup=True,
+                 max_length=None, required_columns=None):
+        self.columns = list(columns) if columns is not None else list(TRANSLATION_COLUMNS)
+        self.targets = list(targets) if targets is not None else ["en"]
+        self.chunk_rows = chunk_rows
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.max_length = max_length or {}
+        self.required_columns = list(required_columns) if required_columns is not None else list(COLUMNS_TO_CHECK)
+
+    @classmethod
+    def from_dict(cls, spec):
+        if not isinstance(spec, dict):
+            raise ValueError("The job spec must be an object")
+
+        unknown = set(spec) - {"columns", "targets", "chunk_rows", "batch_size", "dedup", "max_length", "required_columns"}
+        if unknown:
+            raise ValueError(f"Unknown job spec fields: {', '.join(sorted(unknown))}")
+
+        for field in ("columns", "targets", "required_columns"):
+            value = spec.get(field)
+            if value is not None and (not isinstance(value, list) or not all(isinstance(v, str) and v for v in value)):
+                raise ValueError(f"{field} must be a list of names")
+
+        if "columns" in spec and not spec["columns"]:
+            raise ValueError("columns cannot be empty")
+        if "targets" in spec and not spec["targets"]:
+            raise ValueError("targets cannot be empty")
+
+        for field in ("chunk_rows", "batch_size"):
+            if field in spec and (not isinstance(spec[field], int) or isinstance(spec[field], bool)):
+                raise ValueError(f"{field} must be an integer")
+        if spec.get("batch_size", 1) <= 0:
+            raise ValueError("batch_size must be positive")
+
+        max_length = spec.get("max_length", {})
+        if isinstance(max_length, int) and not isinstance(max_length, bool):
+            # The same limit for every column
+            max_length = {c: max_length for c in spec.get("columns", TRANSLATION_COLUMNS)}
+        if not isinstance(max_length, dict) or not all(isinstance(v, int) and v > 0 for v in max_length.values()):
+            raise ValueError("max_length must be a positive integer, or an object of positive integers by column")
+
+        return cls(
+            columns=spec.get("columns"),
+            targets=spec.get("targets"),
+            chunk_rows=spec.get("chunk_rows", CSV_CHUNK_ROWS),
+            batch_size=spec.get("batch_size", 500),
+            dedup=bool(spec.get("dedup", True)),
+            max_length=max_length,
+            required_columns=spec.get("required_columns"),
+        )
+
+    def to_dict(self):
+        return {
+            "columns": self.columns,
+            "targets": self.targets,
+            "chunk_rows": self.chunk_rows,
+            "batch_size": self.batch_size,
+            "dedup": self.dedup,
+            "max_length": self.max_length,
+            "required_columns": self.required_columns,
+        }
+
+    def fingerprint(self):
+        # Part of the job id: a different plan doesn't reuse the checkpoints
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    def target_column(self, column, target):
+        return f"{column}_{target}"
+
+    def target_columns(self):
+        return [self.target_column(c, t) for t in self.targets for c in self.columns]
+
+    def input_columns(self):
+        return list(dict.fromkeys(self.required_columns + self.columns))
+
+
+def load_market_spec(market):
+    # Sidecar spec of the market, in its pending folder
+    key = f"{TRANSLATIONS_PENDING_FOLDER}{market}/{TRANSLATIONS_SPEC_FILE}"
+    try:
+        body = get_s3_client().get_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key=key)['Body'].read()
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None
+        raise
+
+    return json.loads(body)
+
+
+def get_job_spec(market, spec=None):
+    """
+    Returns the spec of a job: the one given with the request, else the
+    market's sidecar spec, else the default spec.
+    """
+    if spec is None:
+        spec = load_market_spec(market)
+    if spec is None:
+        return JobSpec()
+    return JobSpec.from_dict(spec)
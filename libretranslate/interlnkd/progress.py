@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+
+counters = None
+counters_lock = threading.Lock()
+
+
+def get_counters():
+    # prometheus_client is imported on first use: the web app must set
+    # PROMETHEUS_MULTIPROC_DIR before it is imported
+    global counters
+
+    with counters_lock:
+        if counters is None:
+            from prometheus_client import Counter
+
+            counters = (
+                Counter('libretranslate_translated_rows', 'Rows of CSV files translated', ['market']),
+                Counter('libretranslate_translated_characters', 'Characters of CSV files sent to the models', ['market', 'column']),
+            )
+
+    return counters
+
+
+class TranslationProgress:
+    """
+    Tracks the progress of a CSV translation. Publishes it as the state of
+    the celery task (read by GET /jobs/<id>) and counts the rows and
+    characters translated in Prometheus. heartbeat, if given, is called
+    on each update.
+    """
+    def __init__(self, task=None, market="", heartbeat=None):
+        self.task = task
+        self.market = market
+        self.heartbeat = heartbeat
+        self.started = time.time()
+        self.chunks = 0
+        self.rows = 0
+        self.characters = 0
+        self.column = None
+
+    def get_state(self):
+        elapsed = max(time.time() - self.started, 1e-6)
+        return {
+            "started": self.started,
+            "done": self.rows,
+            "chunks": self.chunks,
+            "column": self.column,
+            "rows_per_second": round(self.rows / elapsed, 2),
+            "characters_per_second": round(self.characters / elapsed, 2),
+        }
+
+    def publish(self):
+        if self.heartbeat is not None:
+            self.heartbeat()
+        if self.task is not None and self.task.request.id is not None:
+            self.task.update_state(state="PROGRESS", meta=self.get_state())
+
+    def column_started(self, column):
+        self.column = column
+        self.publish()
+
+    def texts_translated(self, texts):
+        characters = sum(len(t) for t in texts)
+        self.characters += characters
+        get_counters()[1].labels(self.market, self.column or "").inc(characters)
+        self.publish()
+
+    def chunk_done(self, rows):
+        self.chunks += 1
+        self.rows += rows
+        get_counters()[0].labels(self.market).inc(rows)
+        self.publish()
+
+
+def start_metrics_server(port):
+    from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Prefork workers: collect the metrics of all the processes
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
+
+    print(f"Serving worker metrics on port {port}", flush=True)
+
+
+def mark_process_dead(pid):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,286 @@
+import concurrent.futures
+import itertools
+import math
+import time
+import uuid
+
+from botocore.exceptions import ClientError
+
+from .aws.util import get_s3_client, scan_s3_folder
+from .constants import (
+    INTERLNKD_LOVELACE_PRIVATE,
+    TRANSLATIONS_CLAIM_TTL,
+    TRANSLATIONS_LARGE_FILE_BYTES,
+    TRANSLATIONS_MARKET_CONCURRENCY,
+    TRANSLATIONS_MARKET_LEASE,
+    TRANSLATIONS_PENDING_FOLDER,
+    TRANSLATIONS_PROCESSING_FOLDER,
+    TRANSLATIONS_PROCESSING_LEASE,
+    TRANSLATIONS_QUEUE_LARGE,
+    TRANSLATIONS_QUEUE_SMALL,
+    TRANSLATIONS_SCAN_CONCURRENCY,
+)
+from .formats import is_supported_file
+
+redis_clients = {}
+market_slots = None
+
+
+def get_redis(broker_url):
+    # Shared by the market slots and the file claims; None when the
+    # broker is not Redis (e.g. memory:// in tests)
+    if not broker_url or not broker_url.startswith("redis"):
+        return None
+
+    if broker_url not in redis_clients:
+        import redis
+
+        redis_clients[broker_url] = redis.Redis.from_url(broker_url)
+
+    return redis_clients[broker_url]
+
+
+def get_object_size(key):
+    try:
+        return get_s3_client().head_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key=key)['ContentLength']
+    except Exception as e:
+        print(f"Cannot read the size of {key}: {e}", flush=True)
+        return None
+
+
+def get_priority(size):
+    # Redis consumes priority 0 first: 0 up to 1MB, then one level
+    # lower each time the size doubles (9 from 256MB)
+    mb = size / (1024 * 1024)
+    if mb <= 1:
+        return 0
+    return min(9, int(math.log2(mb)) + 1)
+
+
+def get_route(key, size=None):
+    """
+    Returns the apply_async routing options (queue and priority) of the
+    translation task of a file, based on its size.
+    """
+    if size is None:
+        size = get_object_size(key)
+    if size is None:
+        return {"queue": TRANSLATIONS_QUEUE_LARGE, "priority": 4}
+
+    queue = TRANSLATIONS_QUEUE_SMALL if size <= TRANSLATIONS_LARGE_FILE_BYTES else TRANSLATIONS_QUEUE_LARGE
+    return {"queue": queue, "priority": get_priority(size)}
+
+
+class MarketSlots:
+    """
+    Caps the number of files of each market translated at the same time,
+    across all the workers. The running tasks of a market are kept in a
+    Redis sorted set, scored by their last progress: the first cap tasks
+    hold a slot, and the slot of a task that stopped reporting (e.g. its
+    worker died) expires after lease seconds.
+    """
+    def __init__(self, redis, cap, lease):
+        self.redis = redis
+        self.cap = cap
+        self.lease = lease
+
+    def key(self, market):
+        return f"translations:running:{market}"
+
+    def acquire(self, market, task_id):
+        key = self.key(market)
+        now = time.time()
+
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(key, 0, now - self.lease)
+        pipe.zadd(key, {task_id: now}, nx=True)
+        pipe.zrank(key, task_id)
+        rank = pipe.execute()[-1]
+
+        if rank is not None and rank < self.cap:
+            return True
+
+        self.redis.zrem(key, task_id)
+        return False
+
+    def refresh(self, market, task_id):
+        self.redis.zadd(self.key(market), {task_id: time.time()}, xx=True)
+
+    def release(self, market, task_id):
+        self.redis.zrem(self.key(market), task_id)
+
+
+def get_market_slots(broker_url):
+    global market_slots
+
+    if market_slots is None and TRANSLATIONS_MARKET_CONCURRENCY > 0:
+        redis = get_redis(broker_url)
+        if redis is not None:
+            market_slots = MarketSlots(redis, TRANSLATIONS_MARKET_CONCURRENCY, TRANSLATIONS_MARKET_LEASE)
+
+    return market_slots
+
+
+def list_markets():
+    markets = []
+    paginator = get_s3_client().get_paginator('list_objects_v2')
+
+    try:
+        for page in paginator.paginate(Bucket=INTERLNKD_LOVELACE_PRIVATE, Prefix=TRANSLATIONS_PENDING_FOLDER, Delimiter='/'):
+            for prefix in page.get('CommonPrefixes', []):
+                markets.append(prefix['Prefix'][len(TRANSLATIONS_PENDING_FOLDER):].rstrip('/'))
+    except ClientError as e:
+        print("Error listing the markets:", e, flush=True)
+
+    return markets
+
+
+def list_pending_files():
+    """
+    Returns the pending files of all the markets, alternating between
+    markets so that a large backlog in one market does not delay the others.
+    """
+    files = []
+    for market in list_markets():
+        files.append([key for key in scan_s3_folder(INTERLNKD_LOVELACE_PRIVATE, f"{TRANSLATIONS_PENDING_FOLDER}{market}/")
+                      if is_supported_file(key)])
+
+    return [key for keys in itertools.zip_longest(*files) for key in keys if key is not None]
+
+
+def move_file(s3_client, key, new_key, etag=None):
+    copy_args = {"CopySourceIfMatch": etag} if etag else {}
+    s3_client.copy_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, CopySource={'Bucket': INTERLNKD_LOVELACE_PRIVATE, 'Key': key},
+                          Key=new_key, **copy_args)
+    s3_client.delete_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key=key)
+
+
+def get_claim_key(key):
+    # A file keeps the claim of its pending key while it is in the processing folder
+    if key.startswith(TRANSLATIONS_PROCESSING_FOLDER):
+        key = TRANSLATIONS_PENDING_FOLDER + key[len(TRANSLATIONS_PROCESSING_FOLDER):]
+    return f"translations:claim:{key}"
+
+
+def claim_file(key, redis=None):
+    """
+    Moves a pending file to the processing folder, so that the following
+    scans do not see it anymore. A Redis key makes the claim exclusive
+    between concurrent scans; it holds the id of the task the file is
+    dispatched to. Returns the processing key, the size of the file and
+    the task id, or None when it was claimed by another scan (or is gone).
+    """
+    task_id = str(uuid.uuid4())
+    if redis is not None and not redis.set(get_claim_key(key), task_id, nx=True, ex=TRANSLATIONS_CLAIM_TTL):
+        return None
+
+    processing_key = TRANSLATIONS_PROCESSING_FOLDER + key[len(TRANSLATIONS_PENDING_FOLDER):]
+    s3_client = get_s3_client()
+
+    try:
+        head = s3_client.head_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key=key)
+        # Only move the version that was listed (not a file being replaced)
+        move_file(s3_client, key, processing_key, etag=head['ETag'])
+    except ClientError as e:
+        print(f"Cannot claim {key}: {e}", flush=True)
+        return None
+
+    return processing_key, head['ContentLength'], task_id
+
+
+def hold_claim(redis, key, task_id):
+    """
+    Extends the claim of a processing file by TRANSLATIONS_PROCESSING_LEASE
+    seconds. Returns False when task_id does not own the claim anymore: the
+    file was re-queued after the claim expired, and dispatched to another
+    task. Files outside the processing folder are not claimed.
+    """
+    if not key.startswith(TRANSLATIONS_PROCESSING_FOLDER):
+        return True
+
+    claim_key = get_claim_key(key)
+    if redis.get(claim_key) != task_id.encode():
+        return False
+
+    redis.expire(claim_key, TRANSLATIONS_PROCESSING_LEASE)
+    return True
+
+
+def release_claim(redis, key, task_id):
+    if key.startswith(TRANSLATIONS_PROCESSING_FOLDER) and redis.get(get_claim_key(key)) == task_id.encode():
+        redis.delete(get_claim_key(key))
+
+
+def dispatch_file(key, dispatch, redis=None):
+    """
+    Claims a pending file and calls dispatch(key, options) with its key in
+    the processing folder. options are the apply_async options of its
+    task (route and task id). Returns that key, or None if the file could
+    not be claimed.
+    """
+    claimed = claim_file(key, redis)
+    if claimed is None:
+        return None
+
+    processing_key, size, task_id = claimed
+    try:
+        dispatch(processing_key, {**get_route(processing_key, size), "task_id": task_id})
+    except Exception as e:
+        # Put the file back for the next scan
+        print(f"Cannot dispatch {processing_key}: {e}", flush=True)
+        move_file(get_s3_client(), processing_key, key)
+        if redis is not None:
+            redis.delete(get_claim_key(key))
+        return None
+
+    # The task may wait in its queue for a while before it holds the claim
+    if redis is not None:
+        redis.expire(get_claim_key(key), TRANSLATIONS_PROCESSING_LEASE)
+
+    return processing_key
+
+
+def requeue_lost_files(redis):
+    """
+    Moves back to the pending folder the processing files whose claim
+    expired, i.e. whose task was lost (worker killed, broker data lost,
+    ...) or stopped making progress. Returns their pending keys.
+    """
+    if redis is None:
+        return []
+
+    s3_client = get_s3_client()
+    requeued = []
+    for key in scan_s3_folder(INTERLNKD_LOVELACE_PRIVATE, TRANSLATIONS_PROCESSING_FOLDER):
+        if not is_supported_file(key):
+            continue
+
+        # Claim the file while it is moved, so that a concurrent scan does not move it too
+        claim_key = get_claim_key(key)
+        if not redis.set(claim_key, "requeue", nx=True, ex=TRANSLATIONS_CLAIM_TTL):
+            continue
+
+        pending_key = TRANSLATIONS_PENDING_FOLDER + key[len(TRANSLATIONS_PROCESSING_FOLDER):]
+        try:
+            move_file(s3_client, key, pending_key)
+            requeued.append(pending_key)
+        except ClientError as e:
+            print(f"Cannot re-queue {key}: {e}", flush=True)
+        finally:
+            redis.delete(claim_key)
+
+    return requeued
+
+
+def dispatch_pending_files(dispatch, redis=None, concurrency=TRANSLATIONS_SCAN_CONCURRENCY):
+    """
+    Claims and dispatches all the pending files, concurrently. Returns
+    the keys of the dispatched files.
+    """
+    files = list_pending_files()
+    if not files:
+        return []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        keys = executor.map(lambda key: dispatch_file(key, dispatch, redis), files)
+        return [key for key in keys if key is not None]
@@ -1,14 +1,120 @@
+from argparse import Namespace
 from celery import shared_task
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 import os
 import asyncio
+from libretranslate import cache, memory, pool, residency, segmentation, warmup
+from libretranslate.default_values import DEFAULT_ARGUMENTS
+from ..constants import TRANSLATIONS_MARKET_RETRY_DELAY, TRANSLATIONS_MAX_RETRIES, TRANSLATIONS_METRICS_PORT
+from ..scheduling import dispatch_pending_files, get_market_slots, get_redis, hold_claim, release_claim, requeue_lost_files
+from ..jobspec import get_job_spec
+from ..progress import TranslationProgress, mark_process_dead, start_metrics_server
 from ..utils import translate_csv_file
 
-@shared_task
-def generate_product_translations(key):
+
+def get_worker_args():
+    # Workers don't go through create_app, so they are configured
+    # from the LT_* environment variables only
+    return Namespace(**{k.lower(): v for k, v in DEFAULT_ARGUMENTS.items()})
+
+
+@worker_init.connect
+def preload_worker(**kwargs):
+    # Runs in the celery master before the prefork pool starts its processes
+    if get_worker_args().preload:
+        memory.preload()
+
+    if TRANSLATIONS_METRICS_PORT > 0:
+        start_metrics_server(TRANSLATIONS_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def shutdown_worker(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
+@worker_process_init.connect
+def setup_worker(**kwargs):
+    args = get_worker_args()
+    if cache.get_cache() is None:
+        cache.setup(args)
+
+    # All the tasks of a worker share the same translation pool (when
+    # LT_TRANSLATION_WORKERS is set, run celery with --pool threads)
+    residency.setup(args.model_memory_budget)
+    segmentation.setup(args.segment_cache_size)
+    pool.setup(args.translation_workers, args.translation_worker_threads, warmup.get_pairs(args.warmup), args.model_memory_budget,
+               args.segment_cache_size)
+    warmup.setup(args)
+
+    if "signal" in kwargs:
+        # Process start (not a task)
+        memory.report("Celery worker")
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=None)
+def generate_product_translations(self, key, failures=0, spec=None):
+    parts = key.split('/')
+    market = parts[4]
+
+    redis = get_redis(self.app.conf.broker_url or "")
+    if redis is not None and not hold_claim(redis, key, self.request.id):
+        # The claim of the file expired and it was dispatched again
+        print(f"{key} was re-queued, skipping task {self.request.id}", flush=True)
+        return
+
+    # Waiting for a market slot is retried without limit; only the failed
+    # attempts count towards TRANSLATIONS_MAX_RETRIES
+    slots = get_market_slots(self.app.conf.broker_url or "")
+    if slots is not None and not slots.acquire(market, self.request.id):
+        raise self.retry(countdown=TRANSLATIONS_MARKET_RETRY_DELAY)
+
+    # If the worker dies, the task is redelivered (acks_late) and resumes
+    # from the last checkpointed chunk. Failed attempts are retried too,
+    # and the file is moved to the failed folder only on the last one.
+    last_attempt = failures >= TRANSLATIONS_MAX_RETRIES
+
     try:
-        parts = key.split('/') 
-        market = parts[4]
-        asyncio.run(translate_csv_file(key, market))
-               
+        # Thread and solo pools don't send worker_process_init
+        setup_worker()
+
+        def heartbeat():
+            if slots is not None:
+                slots.refresh(market, self.request.id)
+            if redis is not None:
+                hold_claim(redis, key, self.request.id)
+
+        progress = TranslationProgress(self, market, heartbeat=heartbeat)
+        job_spec = get_job_spec(market, spec)
+        asyncio.run(translate_csv_file(key, market, spec=job_spec, move_on_failure=last_attempt, progress=progress))
+
+        if redis is not None:
+            release_claim(redis, key, self.request.id)
+
     except Exception as e:
-        raise e
\ No newline at end of file
+        if last_attempt:
+            if redis is not None:
+                release_claim(redis, key, self.request.id)
+            raise e
+        raise self.retry(exc=e, countdown=60, kwargs={**self.request.kwargs, "failures": failures + 1})
+
+    finally:
+        if slots is not None:
+            slots.release(market, self.request.id)
+
+
+@shared_task(bind=True, ignore_result=True)
+def scan_pending_translations(self):
+    # Run by celery beat every TRANSLATIONS_SCAN_INTERVAL seconds
+    redis = get_redis(self.app.conf.broker_url)
+    requeued = requeue_lost_files(redis)
+    if requeued:
+        print(f"Re-queued {len(requeued)} lost files", flush=True)
+
+    dispatch = lambda key, options: generate_product_translations.apply_async(args=[key], **options)
+    keys = dispatch_pending_files(dispatch, redis)
+
+    if keys:
+        print(f"Dispatched {len(keys)} pending files", flush=True)
+
+    return len(keys)
@@ -1,43 +1,27 @@
 import os 
-from smart_open import open
+import numpy as np
 import pandas as pd
-from .aws.util import get_s3_client
+from .aws.util import get_s3_client, open_s3_file, s3_call
+from .checkpoints import chunk_name, get_checkpoint_store, get_job_id
+from .formats import get_file_format
+from .jobspec import JobSpec
 import asyncio
-from .constants import S3_URL, COLUMNS_TO_CHECK, FAILED_FOLDER, INTERLNKD_LOVELACE_PRIVATE, TRANSLATIONS_PENDING_FOLDER, TRANSLATIONS_COMPLETED_FOLDER
-from libretranslate.language import model2iso, iso2model, detect_languages, improve_translation_formatting
-from libretranslate.language import load_languages
-from html import unescape
-from translatehtml import translate_html
+from .constants import CSV_UPLOAD_PART_SIZE, TRANSLATION_THREADS, FAILED_FOLDER, INTERLNKD_LOVELACE_PRIVATE, TRANSLATIONS_COMPLETED_FOLDER
+from libretranslate.language import iso2model, detect_languages, detect_translatable
+from libretranslate.language import get_language, get_translation
+from libretranslate import engine, pool
 import time
 import concurrent.futures
-from io import StringIO
-import traceback
-import uuid
-# Rough map of emoji characters
-emojis = {e: True for e in \
-  [ord(' ')] +                    # Spaces
-  list(range(0x1F600,0x1F64F)) +  # Emoticons
-  list(range(0x1F300,0x1F5FF)) +  # Misc Symbols and Pictographs
-  list(range(0x1F680,0x1F6FF)) +  # Transport and Map
-  list(range(0x2600,0x26FF)) +    # Misc symbols
-  list(range(0x2700,0x27BF)) +    # Dingbats
-  list(range(0xFE00,0xFE0F)) +    # Variation Selectors
-  list(range(0x1F900,0x1F9FF)) +  # Supplemental Symbols and Pictographs
-  list(range(0x1F1E6,0x1F1FF)) +  # Flags
-  list(range(0x20D0,0x20FF))      # Combining Diacritical Marks for Symbols
-}
-
 async def move_file_to_new_folder(new_folder, file_name, bucket, source_path):
-    s3_client = get_s3_client()
     # Specify the source and destination paths
     destination_path = f'{new_folder}{file_name}'
 
     try:
-        if s3_client:
+        if get_s3_client():
             # Move the file within the S3 bucket
-            s3_client.copy_object(Bucket=bucket, CopySource={'Bucket': bucket, 'Key': source_path},
-                                  Key=destination_path)
-            s3_client.delete_object(Bucket=bucket, Key=source_path)
+            await s3_call('copy_object', Bucket=bucket, CopySource={'Bucket': bucket, 'Key': source_path},
+                          Key=destination_path)
+            await s3_call('delete_object', Bucket=bucket, Key=source_path)
             print(f'File moved from {source_path} to {new_folder}', flush=True)
     except Exception as e:
         # Handle the exception
@@ -45,6 +29,14 @@ async def move_file_to_new_folder(new_folder, file_name, bucket, source_path):
         # Optionally, you can raise the exception again if you want the caller to handle it as well
 
 
+def get_object_version(key):
+    try:
+        return get_s3_client().head_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key=key)['ETag']
+    except Exception as e:
+        print(f"Cannot read the version of {key}: {e}", flush=True)
+        return ""
+
+
 def is_csv_file(file_name):
     _, file_extension = os.path.splitext(file_name)
     return file_extension.lower() == '.csv'
@@ -52,60 +44,32 @@ def is_csv_file(file_name):
 
 async def delete_file_from_s3(file_key, folder_prefix):
     try:
-        s3_client = get_s3_client()
-        if s3_client:
-            s3_client.delete_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key=file_key)
+        if get_s3_client():
+            await s3_call('delete_object', Bucket=INTERLNKD_LOVELACE_PRIVATE, Key=file_key)
             print(f"The file '{file_key}' in the folder '{folder_prefix}' has been deleted.", flush=True)
         return
     except Exception as e:
         print(f"Error: {str(e)}")
 
 
-async def upload_data_to_s3(csv_buffer, bucket, s3_key):
-    try:
-        s3_client = get_s3_client()
-
-        if s3_client:
-            s3_client.put_object(
-                Bucket=bucket,
-                Key=s3_key,
-                Body=csv_buffer.getvalue()
-            )
-        return
-    except Exception as e:
-        print(f"Failed to upload {s3_key} to {bucket}", flush=True)
-
-
-async def upload_csv_to_bucket(final_df, destination_folder, file_name):
-    try:
-        csv_buffer = StringIO()
-        final_df.to_csv(csv_buffer, index=False)
-
-        await upload_data_to_s3(csv_buffer, INTERLNKD_LOVELACE_PRIVATE, destination_folder + file_name)
-        print(f"Uploaded to {destination_folder}", flush=True)
-        return
-    except Exception as e:
-        # Log the exception or handle it as needed
-        print(f"An error occurred: {str(e)}")
-        traceback.print_exc()  # This prints the traceback to help debug
-        # You might want to raise or return an appropriate value here
-
-
-async def translate_csv_file(key, market):
+async def translate_csv_file(key, market, spec=None, move_on_failure=True, progress=None):
     start_time = time.time()
     file_name = os.path.basename(key)
 
-    print([l.code for l in load_languages()], flush=True)
+    if spec is None:
+        spec = JobSpec()
+    chunk_rows = spec.chunk_rows
 
     try:
-        if not is_csv_file(key):
-            print("Please provide a valid csv file", flush=True)
+        file_format = get_file_format(key)
+        if file_format is None:
+            print("Please provide a valid csv, parquet or arrow file", flush=True)
             return None
 
         # Read header first
-        with open(f"{S3_URL}{key}", 'rb') as s3_file:
-            header = pd.read_csv(s3_file, nrows=0).columns.tolist()
-            missing_columns = [col for col in COLUMNS_TO_CHECK if col not in header]
+        with open_s3_file(key, 'rb') as s3_file:
+            header = file_format.read_header(s3_file)
+            missing_columns = [col for col in spec.input_columns() if col not in header]
             if missing_columns:
                 print(f"Missing required columns: {', '.join(missing_columns)}", flush=True)
                 await move_file_to_new_folder(
@@ -116,63 +80,54 @@ async def translate_csv_file(key, market):
                 )
                 return None
 
-        # Read full CSV
-        with open(f"{S3_URL}{key}", 'rb') as s3_file:
-            df = pd.read_csv(s3_file, low_memory=False)
-
-            df["description"] = df["description"].fillna("oov").astype(str)
-            df["product_name"] = df["product_name"].fillna("oov").astype(str)
-            # df["raw_category"] = df["raw_category"].fillna("oov").astype(str)
-
-            max_workers = 5
-            chunk_size = 500
-
-            # df = translate_column(
-            #     df,
-            #     column="raw_category",
-            #     target_column="raw_category_en",
-            #     source_lang=market,
-            #     target_lang="en",
-            #     chunk_size=chunk_size,
-            #     max_workers=max_workers
-            # )
-
-            df = translate_column(
-                df,
-                column="product_name",
-                target_column="product_name_en",
-                source_lang=market,
-                target_lang="en",
-                chunk_size=chunk_size,
-                max_workers=max_workers
-            )
-
-            df = translate_column(
-                df,
-                column="description",
-                target_column="description_en",
-                source_lang=market,
-                target_lang="en",
-                chunk_size=chunk_size,
-                max_workers=max_workers
-            )
-
-            destination_folder = TRANSLATIONS_COMPLETED_FOLDER + f'{market}/'
-            random_uuid = uuid.uuid4()
-            new_file_name = f"{str(random_uuid)}.csv"
-
-            await upload_csv_to_bucket(df, destination_folder, file_name)
+        # Stream the file in row chunks and checkpoint each translated chunk
+        # under the job prefix. A retried job skips the chunks that are
+        # already checkpointed, so only the remaining rows get translated.
+        job_id = get_job_id(key, chunk_rows, get_object_version(key), spec.fingerprint())
+        store = get_checkpoint_store(job_id)
+        completed = set(store.list())
+        total_rows = 0
+
+        if completed:
+            print(f"Resuming job {job_id}: {len(completed)} chunks already translated", flush=True)
+
+        with open_s3_file(key, 'rb') as s3_file:
+            for i, df in enumerate(file_format.read_chunks(s3_file, chunk_rows, spec.columns)):
+                total_rows += len(df)
+                name = chunk_name(i, file_format.checkpoint_extension)
+                if name in completed:
+                    continue
+
+                df = translate_chunk(df, market, spec=spec, progress=progress)
+                store.write(name, file_format.serialize_chunk(df, i, spec.target_columns()))
+                if progress is not None:
+                    progress.chunk_done(len(df))
+                print(f"Translated chunk {i + 1} ({total_rows} rows so far)", flush=True)
+
+        # Assemble the checkpoints into the output file. smart_open uploads it
+        # with a S3 multipart upload, so memory stays bounded by the chunk size
+        # (and the upload part size) instead of the file size.
+        destination_key = TRANSLATIONS_COMPLETED_FOLDER + f'{market}/' + file_name
+        with open_s3_file(key, 'rb') as s3_file, open_s3_file(destination_key, 'wb', min_part_size=CSV_UPLOAD_PART_SIZE) as out_file:
+            file_format.write(s3_file, out_file, (store.read_bytes(name) for name in store.list()), chunk_rows)
+
+        print(f"Uploaded to {destination_key}", flush=True)
+        store.clear()
 
         # Optional: delete original file after processing
-        await delete_file_from_s3(key, folder_prefix=TRANSLATIONS_PENDING_FOLDER + f'{market}')
+        await delete_file_from_s3(key, folder_prefix=os.path.dirname(key))
         print(f"Deleted {key}", flush=True)
         elapsed = time.time() - start_time
-        print(f"Translated {len(df)} rows in {elapsed / 60:.2f} minutes", flush=True)
+        print(f"Translated {total_rows} rows in {elapsed / 60:.2f} minutes", flush=True)
 
         return key, market
 
     except Exception as e:
         print(f"Experienced an error: translate_csv_file", flush=True)
+        if not move_on_failure:
+            # Leave the file (and the checkpoints) in place for the next attempt
+            raise e
+
         await move_file_to_new_folder(
             new_folder=FAILED_FOLDER + f"{market}/",
             file_name=file_name,
@@ -184,15 +139,59 @@ async def translate_csv_file(key, market):
         raise e
     
 
-def translate_column(
+def get_max_workers():
+    # With a translation pool, the threads only wait for the pool workers:
+    # one thread per worker keeps all of them busy without oversubscribing cores
+    translation_pool = pool.get_pool()
+    if translation_pool is not None:
+        return translation_pool.workers
+    return TRANSLATION_THREADS
+
+
+def translate_chunk(df, market, spec=None, max_workers=None, progress=None):
+    if spec is None:
+        spec = JobSpec()
+    if max_workers is None:
+        max_workers = get_max_workers()
+
+    texts = {}
+    for column in spec.columns:
+        df[column] = df[column].fillna("oov").astype(str)
+        texts[column] = df[column]
+        if column in spec.max_length:
+            texts[column] = df[column].str.slice(0, spec.max_length[column])
+
+    for target in spec.targets:
+        df = translate_columns(
+            df,
+            texts,
+            target_columns={column: spec.target_column(column, target) for column in spec.columns},
+            source_lang=market,
+            target_lang=target,
+            chunk_size=spec.batch_size,
+            max_workers=max_workers,
+            dedup=spec.dedup,
+            progress=progress
+        )
+
+    return df
+
+
+def translate_columns(
     df,
-    column: str,
-    target_column: str,
+    texts,
+    target_columns,
     source_lang: str,
     target_lang: str,
     chunk_size,
-    max_workers
+    max_workers,
+    dedup=True,
+    progress=None
 ):
+    """
+    Translates the texts (a Series by column) of several columns in a
+    single pass and writes them to their target columns.
+    """
     def executor_translate(batch):
         payload = {
             "q": batch,
@@ -204,19 +203,36 @@ def translate_column(
         result_dict = translate_batch(payload) 
         return result_dict.get("translatedText", [])
 
-    texts_to_translate = df[column].tolist()
+    start_time = time.time()
+    label = ",".join(texts)
+
+    # Product feeds repeat the same names, descriptions and "oov" fill values
+    # many times over (also across columns): translate each distinct value
+    # once, then scatter the results back to the rows
+    values = pd.concat(list(texts.values()), ignore_index=True)
+    if dedup:
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        texts_to_translate = uniques.tolist()
+    else:
+        codes = np.arange(len(values))
+        texts_to_translate = values.tolist()
     chunks = [texts_to_translate[i:i + chunk_size] for i in range(0, len(texts_to_translate), chunk_size)]
 
     translated_texts = []
 
+    if progress is not None:
+        progress.column_started(label)
+
     try:
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = [executor.submit(executor_translate, chunk) for chunk in chunks]
             
-            for future in futures: 
+            for chunk, future in zip(chunks, futures): 
                 try:
                     result = future.result()
                     translated_texts.extend(result)
+                    if progress is not None:
+                        progress.texts_translated(chunk)
                 except Exception as e:
             
                     print(f"A chunk failed: {e}. Cannot reliably determine length for placeholders.", flush=True)
@@ -227,32 +243,22 @@ def translate_column(
         print(f"Batch failed: {e}", flush=True)
         raise # Re-raise to ensure error is propagated to translate_csv_file
 
-    if len(translated_texts) != len(df):
+    if len(translated_texts) != len(texts_to_translate):
          raise ValueError(
-             f"Translation length mismatch: Got {len(translated_texts)} results for {len(df)} rows."
+             f"Translation length mismatch: Got {len(translated_texts)} results for {len(texts_to_translate)} unique values."
          )
-         
-    df[target_column] = translated_texts
-
-    return df
-
-
-def detect_translatable(src_texts):
-  if isinstance(src_texts, list):
-    return any(detect_translatable(t) for t in src_texts)
-
-  for ch in src_texts:
-    if not (ord(ch) in emojis):
-      return True
 
-  # All emojis
-  return False
+    translated = np.asarray(translated_texts, dtype=object)[codes]
+    offset = 0
+    for column, series in texts.items():
+        df[target_columns[column]] = translated[offset:offset + len(series)]
+        offset += len(series)
 
+    elapsed = time.time() - start_time
+    dedup_ratio = 1 - len(texts_to_translate) / len(values) if len(values) else 0
+    print(f"Translated {label} to {target_lang}: {len(texts_to_translate)} unique values for {len(values)} values (dedup ratio {dedup_ratio:.1%}) in {elapsed:.2f}s", flush=True)
 
-def filter_unique(seq, extra):
-    seen = set({extra, ""})
-    seen_add = seen.add
-    return [x for x in seq if not (x in seen or seen_add(x))]
+    return df
 
 
 def translate_batch(payload):
@@ -274,26 +280,23 @@ def translate_batch(payload):
     
     translatable = detect_translatable(src_texts)
     
-    if translatable:
+    if any(translatable):
         # Language Detection Logic (kept as in original)
         if source_lang == "auto":
-            candidate_langs = detect_languages(src_texts)
+            candidate_langs = detect_languages([t for t, ok in zip(src_texts, translatable) if ok])
             detected_src_lang = candidate_langs[0]
         else:
             detected_src_lang = {"confidence": 100.0, "language": source_lang}
     else:
         detected_src_lang = {"confidence": 0.0, "language": "en"}
     
-    languages = load_languages()
-
     # 2. Language Code Check (Replaced abort with raise)
-    src_lang = next(iter([l for l in languages if l.code == detected_src_lang["language"]]), None)
+    src_lang = get_language(detected_src_lang["language"])
 
     if src_lang is None:
-        print([l.code for l in languages], 'available languages', flush=True)
         raise ValueError(f"{source_lang} is not supported")
 
-    tgt_lang = next(iter([l for l in languages if l.code == target_lang]), None)
+    tgt_lang = get_language(target_lang)
 
     if tgt_lang is None:
         raise ValueError(f"{target_lang} is not supported")
@@ -311,44 +314,38 @@ def translate_batch(payload):
         tgt_lang,
         translatable,
         num_alternatives,
-        max_workers=5,
+        text_format,
     )
 
     return result
 
 
-def translate_inner_batch(q, src_lang, tgt_lang, translatable, num_alternatives, max_workers=5, inner_group_size=50):
-    batch_results = []
-    
-    groups = [q[i:i + inner_group_size] for i in range(0, len(q), inner_group_size)]
-
-    def executor_translate(text):
-        translator = src_lang.get_translation(tgt_lang)
-
-        if translator is None:
-            raise ValueError(
-                f"{tgt_lang.name} ({tgt_lang.code}) is not available as a target language "
-                f"from {src_lang.name} ({src_lang.code})"
-            )
+def translate_inner_batch(q, src_lang, tgt_lang, translatable, num_alternatives, text_format="text"):
+    translator = get_translation(src_lang, tgt_lang)
 
-        if translatable:
-            hypotheses = translator.hypotheses(text, num_alternatives + 1)
-            translated_text = unescape(improve_translation_formatting(text, hypotheses[0].value))
-        else:
-            translated_text = text
+    if translator is None:
+        raise ValueError(
+            f"{tgt_lang.name} ({tgt_lang.code}) is not available as a target language "
+            f"from {src_lang.name} ({src_lang.code})"
+        )
 
-        return translated_text
+    # Items made only of emojis are sent back as they are
+    batch_results = list(q)
+    indices = [i for i, t in enumerate(translatable) if t]
+    if not indices:
+        return {"translatedText": batch_results}
 
+    # The engine batches the texts itself and hands them to the translation
+    # pool when there is one, so no extra threads are needed here
     try:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            for group in groups:
-                group_results = list(executor.map(executor_translate, group))
-                batch_results.extend(group_results)
-
+        translated = engine.translate_texts(translator, [q[i] for i in indices], text_format, num_alternatives)
     except Exception as e:
         print(f"Batch failed: {e}", flush=True)
         raise
 
+    for i, (t, a) in zip(indices, translated):
+        batch_results[i] = t
+
     return {
         "translatedText": batch_results,
-    }
\ No newline at end of file
+    }
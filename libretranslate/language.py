@@ -1,4 +1,6 @@
 
+import re
+import threading
 from functools import lru_cache
 
 from argostranslate import translate
@@ -6,6 +8,9 @@ from argostranslate import translate
 from libretranslate.detect import Detector
 
 __languages = None
+__languages_by_code = {}
+__translations = {}
+__translations_lock = threading.Lock()
 aliases = {
     'pb': 'pt-BR',
     'zh': 'zh-Hans',
@@ -13,6 +18,26 @@ aliases = {
 }
 rev_aliases = {v.lower(): k for k, v in aliases.items()}
 
+# Number of characters of a text used for language detection
+DETECT_SAMPLE_LENGTH = 1000
+
+# Rough map of emoji characters ([start, end) ranges)
+emoji_ranges = [
+  (ord(' '), ord(' ') + 1),  # Spaces
+  (0x1F600, 0x1F64F),        # Emoticons
+  (0x1F300, 0x1F5FF),        # Misc Symbols and Pictographs
+  (0x1F680, 0x1F6FF),        # Transport and Map
+  (0x2600, 0x26FF),          # Misc symbols
+  (0x2700, 0x27BF),          # Dingbats
+  (0xFE00, 0xFE0F),          # Variation Selectors
+  (0x1F900, 0x1F9FF),        # Supplemental Symbols and Pictographs
+  (0x1F1E6, 0x1F1FF),        # Flags
+  (0x20D0, 0x20FF),          # Combining Diacritical Marks for Symbols
+]
+
+# Matches any character that is not an emoji
+translatable_re = re.compile("[^" + "".join(re.escape(chr(start)) + "-" + re.escape(chr(end - 1)) for start, end in emoji_ranges) + "]")
+
 def iso2model(lang):
     if isinstance(lang, list):
         return [iso2model(l) for l in lang]
@@ -38,71 +63,140 @@ def load_languages():
     global __languages
 
     if __languages is None or len(__languages) == 0:
-        __languages = translate.get_installed_languages()
+        with __translations_lock:
+            if __languages is None or len(__languages) == 0:
+                languages = translate.get_installed_languages()
+                build_registry(languages)
+                __languages = languages
 
     return __languages
 
+def build_registry(languages):
+    global __languages_by_code
+    global __translations
+
+    languages_by_code = {}
+    translations = {}
+    for lang in languages:
+        languages_by_code[lang.code] = lang
+
+        # translations_from already includes the pivot (composite) translations.
+        # Keep the first match for each target, like Language.get_translation
+        for t in lang.translations_from:
+            translations.setdefault((lang.code, t.to_lang.code), t)
+
+    __languages_by_code = languages_by_code
+    __translations = translations
+
+def get_language(code):
+    load_languages()
+    return __languages_by_code.get(code)
+
+def get_translation(src_lang, tgt_lang):
+    load_languages()
+    key = (src_lang.code, tgt_lang.code)
+    translation = __translations.get(key)
+    if translation is None and key not in __translations:
+        with __translations_lock:
+            translation = src_lang.get_translation(tgt_lang)
+            __translations[key] = translation
+
+    return translation
+
 @lru_cache(maxsize=None)
 def load_lang_codes():
     languages = load_languages()
     return tuple(l.code for l in languages)
 
-def detect_languages(text):
+def is_translatable(text):
+    # The search stops at the first character that is not an emoji
+    return translatable_re.search(text) is not None
+
+def detect_translatable(src_texts):
+    """
+    Tells whether a text has anything to translate (i.e. it's not made only
+    of emojis and spaces). For a list, returns one flag per text.
+    """
+    if isinstance(src_texts, list):
+        return [is_translatable(t) for t in src_texts]
+
+    return is_translatable(src_texts)
+
+@lru_cache(maxsize=None)
+def get_detector():
+    # The detector holds no per-text state, so one instance serves all requests
+    return Detector(load_lang_codes())
+
+def sample_text(text, max_length=DETECT_SAMPLE_LENGTH):
+    # A couple of sentences are enough to tell the language of a text.
+    # Cut long inputs at a word boundary so we don't scan whole documents
+    if len(text) <= max_length:
+        return text
+
+    cut = text.rfind(" ", 0, max_length)
+    return text[:cut if cut > 0 else max_length]
+
+def detect_batch(texts):
+    """
+    Detects the language of each text. Returns one list of candidates
+    (Language objects, best first) per text; identical texts are
+    detected only once.
+    """
+    detector = get_detector()
+    detections = {}
+    results = []
+
+    for t in texts:
+        if t not in detections:
+            try:
+                detections[t] = detector.detect(sample_text(t))
+            except Exception as e:
+                print(str(e))
+                detections[t] = []
+        results.append(detections[t])
+
+    return results
+
+def detect_languages(text, per_item=False):
     # detect batch processing
-    if isinstance(text, list):
-        is_batch = True
-    else:
-        is_batch = False
+    if not isinstance(text, list):
         text = [text]
 
-    lang_codes = load_lang_codes()
+    detections = detect_batch(text)
 
-    # get the candidates
-    candidates = []
-    for t in text:
-        try:
-            d = Detector(lang_codes).detect(t)
-            for i in range(len(d)):
-                d[i].text_length = len(t)
-            candidates.extend(d)
-        except Exception as e:
-            print(str(e))
+    if per_item:
+        # one detection (the best candidate) for each text
+        return [{"confidence": d[0].confidence, "language": d[0].code} if d else {"confidence": 0.0, "language": "en"}
+                for d in detections]
 
-    # total read bytes of the provided text
-    text_length_total = sum(c.text_length for c in candidates)
+    # for multiple occurrences of the same language (can happen on batch detection)
+    # calculate the average confidence for each language, weighted by the
+    # total length of the texts it was detected in
+    confidence = {}
+    count = {}
+    text_length = {}
+    for t, d in zip(text, detections):
+        for l in d:
+            confidence[l.code] = confidence.get(l.code, 0.0) + l.confidence
+            count[l.code] = count.get(l.code, 0) + 1
+            text_length[l.code] = text_length.get(l.code, 0) + len(t)
 
     # this happens if no language could be detected
-    if not candidates:
+    if not confidence:
         # use language "en" by default but with zero confidence
         return [{"confidence": 0.0, "language": "en"}]
 
-    # for multiple occurrences of the same language (can happen on batch detection)
-    # calculate the average confidence for each language
-    if is_batch:
-        temp_average_list = []
-        for lang_code in lang_codes:
-            # get all candidates for a specific language
-            lc = list(filter(lambda l: l.code == lang_code, candidates))
-            if len(lc) > 1:
-                # if more than one is present, calculate the average confidence
-                lang = lc[0]
-                lang.confidence = sum(l.confidence for l in lc) / len(lc)
-                lang.text_length = sum(l.text_length for l in lc)
-                temp_average_list.append(lang)
-            elif lc:
-                # otherwise just add it to the temporary list
-                temp_average_list.append(lc[0])
-
-        if temp_average_list:
-            # replace the list
-            candidates = temp_average_list
+    # total read bytes of the provided text
+    text_length_total = sum(text_length.values())
+
+    candidates = [(code, confidence[code] / count[code]) for code in confidence]
 
     # sort the candidates descending based on the detected confidence
     candidates.sort(
-        key=lambda l: 0 if text_length_total == 0 else (l.confidence * l.text_length) / text_length_total, reverse=True
+        key=lambda c: 0 if text_length_total == 0 else (c[1] * text_length[c[0]]) / text_length_total, reverse=True
     )
 
-    return [{"confidence": l.confidence, "language": l.code} for l in candidates]
+    return [{"confidence": conf, "language": code} for code, conf in candidates]
 
 
 def improve_translation_formatting(source, translation, improve_punctuation=True, remove_single_word_duplicates=True):
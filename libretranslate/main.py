@@ -226,6 +226,82 @@ def get_args():
     parser.add_argument(
         "--force-update-models", default=DEFARGS['FORCE_UPDATE_MODELS'], action="store_true", help="Install/Reinstall language models at startup"
     )
+    parser.add_argument(
+        "--translation-workers",
+        default=DEFARGS['TRANSLATION_WORKERS'],
+        type=int,
+        metavar="<number of processes>",
+        help="Run the models in a pool of this many processes, each pinned to its own CPU cores. 0 runs the models in the request threads (%(default)s)",
+    )
+    parser.add_argument(
+        "--translation-worker-threads",
+        default=DEFARGS['TRANSLATION_WORKER_THREADS'],
+        type=int,
+        metavar="<number of threads>",
+        help="Set the number of intra-op threads of each translation worker. 0 uses the number of cores assigned to the worker (%(default)s)",
+    )
+    parser.add_argument(
+        "--micro-batch-size",
+        default=DEFARGS['MICRO_BATCH_SIZE'],
+        type=int,
+        metavar="<number of texts>",
+        help="Combine concurrent translation requests for the same language pair into batches of up to this many texts. 0 disables request coalescing (%(default)s)",
+    )
+    parser.add_argument(
+        "--micro-batch-wait",
+        default=DEFARGS['MICRO_BATCH_WAIT'],
+        type=int,
+        metavar="<milliseconds>",
+        help="Maximum time a request waits for other requests to fill its batch (%(default)s)",
+    )
+    parser.add_argument(
+        "--translation-cache",
+        default=DEFARGS['TRANSLATION_CACHE'],
+        type=str,
+        metavar="<Storage URI>",
+        help="Cache translation results in memory (memory://) or in Redis (redis://...). Set to none to disable (%(default)s)",
+    )
+    parser.add_argument(
+        "--translation-cache-size",
+        default=DEFARGS['TRANSLATION_CACHE_SIZE'],
+        type=int,
+        metavar="<number of entries>",
+        help="Maximum number of translations kept by the memory translation cache (%(default)s)",
+    )
+    parser.add_argument(
+        "--translation-cache-ttl",
+        default=DEFARGS['TRANSLATION_CACHE_TTL'],
+        type=int,
+        metavar="<seconds>",
+        help="Expire cached translations after this many seconds, 0 to never expire (%(default)s)",
+    )
+    parser.add_argument(
+        "--model-memory-budget",
+        default=DEFARGS['MODEL_MEMORY_BUDGET'],
+        type=int,
+        metavar="<megabytes>",
+        help="Keep at most this many MB of models loaded in each process, unloading the least recently used ones. 0 keeps every model loaded once used (%(default)s)",
+    )
+    parser.add_argument(
+        "--segment-cache-size",
+        default=DEFARGS['SEGMENT_CACHE_SIZE'],
+        type=int,
+        metavar="<number of entries>",
+        help="Remember the sentence splitting and tokenization of this many source texts (and sentences) in each process, so that translating a text again with the same model (with alternatives, or to several targets through the same pivot) preprocesses it once. 0 disables it (%(default)s)",
+    )
+    parser.add_argument(
+        "--warmup",
+        default=DEFARGS['WARMUP'],
+        type=str,
+        metavar="<comma-separated language pairs>",
+        help="Load these language pairs (e.g. en:es,es:en) and run a test translation when the server starts, or \"all\" for every installed model. Empty disables warm-up (%(default)s)",
+    )
+    parser.add_argument(
+        "--preload",
+        default=DEFARGS['PRELOAD'],
+        action="store_true",
+        help="Load the languages, tokenizers and language detector before the server forks its workers (gunicorn, celery prefork), so that the workers share their memory. The models are loaded by each worker after the fork (%(default)s)",
+    )
     parser.add_argument(
         "--metrics",
         default=DEFARGS['METRICS'],
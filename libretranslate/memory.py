@@ -0,0 +1,117 @@
+import gc
+import os
+from timeit import default_timer
+
+from libretranslate.engine import get_package_translations
+from libretranslate.language import detect_languages, load_languages
+
+memory_gauge = None
+last_update = 0
+UPDATE_INTERVAL = 30
+
+
+def get_memory_usage(pid="self"):
+    """
+    Returns the resident memory of a process, in bytes, split between
+    pages shared with other processes (e.g. the gunicorn master and the
+    other workers) and private pages. pss is the process' fair share of
+    its resident memory: summing the pss of all the processes of a pod
+    gives its real memory use. Returns None where /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            values = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    values[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        return None
+
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "shared": values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0),
+        "private": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def report(label="Process"):
+    usage = get_memory_usage()
+    if usage is None:
+        return None
+
+    mb = {k: v / 1024 / 1024 for k, v in usage.items()}
+    print(f"{label} (pid {os.getpid()}) memory: rss {mb['rss']:.0f}MB, pss {mb['pss']:.0f}MB, "
+          f"shared {mb['shared']:.0f}MB, private {mb['private']:.0f}MB", flush=True)
+    return usage
+
+
+def setup_metrics():
+    global memory_gauge
+
+    if memory_gauge is None:
+        from prometheus_client import Gauge
+
+        memory_gauge = Gauge('libretranslate_process_memory_bytes', 'Resident memory of the process', ['type'], multiprocess_mode='liveall')
+
+
+def update_metrics():
+    global last_update
+
+    if memory_gauge is None or default_timer() - last_update < UPDATE_INTERVAL:
+        return
+
+    last_update = default_timer()
+    usage = get_memory_usage()
+    if usage is not None:
+        for k, v in usage.items():
+            memory_gauge.labels(k).set(v)
+
+
+def advise_model_files(pkg):
+    # Ask the kernel to read the model files into the page cache, which
+    # is shared by all the processes that load the model
+    model_dir = pkg.package_path / "model"
+    if not hasattr(os, "posix_fadvise") or not model_dir.is_dir():
+        return
+
+    for path in model_dir.iterdir():
+        if path.is_file():
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+
+
+def preload():
+    """
+    Loads everything that can be shared copy-on-write with forked workers:
+    the languages and translations registry, the language detector profiles
+    and the tokenizers. The CTranslate2 models are not loaded here: their
+    threads do not survive a fork, so each worker loads them after forking
+    (from the page cache).
+    """
+    start = default_timer()
+
+    languages = load_languages()
+    detect_languages("Hello world")
+
+    packages = {}
+    for lang in languages:
+        for translation in lang.translations_from:
+            for t in get_package_translations(translation):
+                packages[str(t.pkg.package_path)] = t.pkg
+
+    for pkg in packages.values():
+        pkg.tokenizer.encode("Hello world")
+        advise_model_files(pkg)
+
+    # Keep the garbage collector from writing to (and un-sharing) the
+    # pages of the objects loaded so far
+    gc.collect()
+    gc.freeze()
+
+    print(f"Preloaded {len(languages)} languages and {len(packages)} models in {default_timer() - start:.2f}s", flush=True)
+    report("Master")
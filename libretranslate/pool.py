@@ -0,0 +1,181 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+pool = None
+setup_lock = threading.Lock()
+
+# The slot of this process's pool among the pools of the host (e.g. one
+# per gunicorn worker), and the number of pools
+slot = (0, 1)
+
+def get_pool():
+    return pool
+
+
+def init_worker(counter, cores_per_worker, threads, warmup_pairs, model_memory_budget, segment_cache_size):
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+
+    # Pin each worker to its own set of cores
+    if cores_per_worker > 0 and hasattr(os, "sched_setaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+        start = (index * cores_per_worker) % len(available)
+        cores = available[start:start + cores_per_worker] or available
+        os.sched_setaffinity(0, cores)
+
+    from libretranslate import engine, residency, segmentation
+    engine.intra_threads = threads
+    residency.setup(model_memory_budget)
+    segmentation.setup(segment_cache_size)
+
+    try:
+        import torch
+        torch.set_num_threads(max(1, threads))
+    except ImportError:
+        pass
+
+    print(f"Translation worker {index} started (pid {os.getpid()}, {threads} threads)", flush=True)
+
+    if warmup_pairs:
+        from libretranslate import warmup
+        warmup.run(warmup_pairs)
+
+
+def run(source, target, texts, text_format, num_alternatives):
+    from libretranslate import engine
+    from libretranslate.language import get_language, get_translation
+
+    translation = get_translation(get_language(source), get_language(target))
+    return engine.translate_missing(translation, texts, text_format, num_alternatives)
+
+
+def run_raw(source, target, texts):
+    from libretranslate import engine
+    from libretranslate.language import get_language, get_translation
+
+    translation = get_translation(get_language(source), get_language(target))
+    return engine.translate_raw(translation, texts)
+
+
+class TranslationPool:
+    """
+    A pool of processes that run the models. Each process is pinned to
+    cores_per_worker cores and runs CTranslate2 with that many intra-op threads,
+    so the number of busy cores never exceeds workers * cores_per_worker.
+    When the host runs several pools (see set_slot), they split its cores.
+    """
+    def __init__(self, workers, threads=0, min_split=8, warmup_pairs=(), model_memory_budget=0, segment_cache_size=0):
+        self.workers = workers
+        self.threads = threads
+        self.min_split = min_split
+        self.warmup_pairs = list(warmup_pairs)
+        self.model_memory_budget = model_memory_budget
+        self.segment_cache_size = segment_cache_size
+        self.started = False
+        self.lock = threading.Lock()
+        self.executor = self.create_executor()
+
+    def create_executor(self):
+        # Spawn instead of fork: the parent process can hold threads and
+        # model state that must not be copied into the workers
+        ctx = multiprocessing.get_context("spawn")
+
+        # The workers of the pool in slot i take the cores after those of
+        # the pools in the previous slots
+        index, count = slot
+        self.cores_per_worker = max(1, (os.cpu_count() or 1) // (self.workers * count))
+        threads = self.threads if self.threads > 0 else self.cores_per_worker
+
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=init_worker,
+            initargs=(ctx.Value('i', index * self.workers), self.cores_per_worker, threads, self.warmup_pairs, self.model_memory_budget,
+                      self.segment_cache_size),
+        )
+
+    def start(self):
+        # Workers are spawned on demand: submitting one task per worker
+        # starts (and warms up) all of them now rather than on the first requests
+        if self.started:
+            return
+        self.started = True
+
+        futures = [self.executor.submit(os.getpid) for i in range(self.workers)]
+        for f in futures:
+            f.result()
+
+    def translate(self, source, target, texts, text_format="text", num_alternatives=0):
+        return self.map(run, source, target, texts, text_format, num_alternatives)
+
+    def translate_raw(self, source, target, texts):
+        return self.map(run_raw, source, target, texts)
+
+    def map(self, fn, source, target, texts, *args):
+        # Split large batches so that all workers can take a share
+        size = max(self.min_split, math.ceil(len(texts) / self.workers))
+        slices = [texts[i:i + size] for i in range(0, len(texts), size)]
+
+        executor = self.executor
+        try:
+            futures = [executor.submit(fn, source, target, s, *args) for s in slices]
+            results = []
+            for f in futures:
+                results.extend(f.result())
+            return results
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory): replace the pool for the next requests
+            with self.lock:
+                if self.executor is executor:
+                    executor.shutdown(wait=False)
+                    self.executor = self.create_executor()
+            raise
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+    def after_fork(self):
+        # A forked process (e.g. gunicorn --preload) inherits the executor
+        # without its management thread nor its processes: start a new one
+        self.lock = threading.Lock()
+        self.executor = self.create_executor()
+        self.started = False
+
+
+def setup(workers, threads=0, warmup_pairs=(), model_memory_budget=0, segment_cache_size=0):
+    global pool
+
+    with setup_lock:
+        if pool is None and workers > 0:
+            pool = TranslationPool(workers, threads, warmup_pairs=warmup_pairs, model_memory_budget=model_memory_budget,
+                                   segment_cache_size=segment_cache_size)
+
+    return pool
+
+
+def set_slot(index, count):
+    """
+    Sets the slot of this process's pool when the host runs count of
+    them, so that their workers are pinned to different cores. Must be
+    called before the pool starts its workers.
+    """
+    global slot
+
+    slot = (index, count)
+    if pool is not None and not pool.started:
+        pool.executor.shutdown(wait=False)
+        pool.executor = pool.create_executor()
+
+
+def after_fork():
+    if pool is not None:
+        pool.after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=after_fork)
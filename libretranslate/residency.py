@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+from timeit import default_timer
+
+manager = None
+
+def get_manager():
+    return manager
+
+
+def get_model_size(translation):
+    # CTranslate2 keeps the weights in memory as they are stored on disk
+    model_dir = translation.pkg.package_path / "model"
+    if not model_dir.is_dir():
+        return 0
+    return sum(p.stat().st_size for p in model_dir.iterdir() if p.is_file())
+
+
+class ResidentModel:
+    def __init__(self, size):
+        self.size = size
+        self.load_time = 0
+        self.last_use = default_timer()
+        self.loaded = threading.Event()
+
+
+class ModelResidency:
+    """
+    Keeps the CTranslate2 models of the package translations in memory
+    within a budget (in bytes). When loading a model would exceed the
+    budget, the least recently used models are unloaded first; they are
+    loaded again the next time they are needed. Models that are in use by
+    a translation are only freed when that translation completes.
+    """
+    def __init__(self, budget):
+        self.budget = budget
+        self.models = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.loads = 0
+        self.evictions = 0
+        self.load_counter = None
+        self.eviction_counter = None
+        self.resident_gauge = None
+
+    def resident_bytes(self):
+        return sum(m.size for m in self.models.values())
+
+    def acquire(self, translation, load):
+        # The lock only guards the table: the memory of a model is reserved
+        # under it, then the model is loaded outside of it, so that a cold
+        # load only blocks the callers that need that same model
+        while True:
+            with self.lock:
+                model = self.models.get(translation)
+                if model is None or (model.loaded.is_set() and translation.translator is None):
+                    model = ResidentModel(get_model_size(translation))
+                    self.models.pop(translation, None)
+                    self.evict(model.size)
+                    self.models[translation] = model
+                    break
+
+                if model.loaded.is_set():
+                    model.last_use = default_timer()
+                    self.models.move_to_end(translation)
+                    return translation.translator
+
+            # Another caller is loading this model
+            model.loaded.wait()
+
+        start = default_timer()
+        try:
+            translator = load(translation)
+        except Exception:
+            with self.lock:
+                if self.models.get(translation) is model:
+                    del self.models[translation]
+            model.loaded.set()
+            raise
+
+        with self.lock:
+            model.load_time = default_timer() - start
+            model.last_use = default_timer()
+            model.loaded.set()
+
+            self.loads += 1
+            if self.load_counter is not None:
+                self.load_counter.inc()
+            self.update_gauge()
+
+        return translator
+
+    def evict(self, size):
+        # Models being loaded hold their reservation until they are loaded
+        for translation in [t for t, m in self.models.items() if m.loaded.is_set()]:
+            if self.resident_bytes() + size <= self.budget:
+                break
+
+            model = self.models.pop(translation)
+            translation.translator = None
+
+            self.evictions += 1
+            if self.eviction_counter is not None:
+                self.eviction_counter.inc()
+            print(f"Unloaded {translation.from_lang.code}->{translation.to_lang.code} model ({model.size / 1024 / 1024:.0f}MB, "
+                  f"loaded in {model.load_time:.2f}s, unused for {default_timer() - model.last_use:.0f}s)", flush=True)
+
+    def update_gauge(self):
+        if self.resident_gauge is not None:
+            self.resident_gauge.set(self.resident_bytes())
+
+
+def setup(budget_mb, metrics=False):
+    global manager
+
+    if manager is None and budget_mb > 0:
+        manager = ModelResidency(budget_mb * 1024 * 1024)
+
+        if metrics:
+            from prometheus_client import Counter, Gauge
+
+            manager.load_counter = Counter('libretranslate_model_loads', 'Number of models loaded in memory')
+            manager.eviction_counter = Counter('libretranslate_model_evictions', 'Number of models unloaded to stay within the memory budget')
+            manager.resident_gauge = Gauge('libretranslate_model_resident_bytes', 'Size of the models loaded in memory', multiprocess_mode='livesum')
+
+    return manager
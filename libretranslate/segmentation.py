@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+sentences_cache = None
+tokens_cache = None
+
+
+def get_sentences_cache():
+    return sentences_cache
+
+
+def get_tokens_cache():
+    return tokens_cache
+
+
+class MemoCache:
+    """
+    A bounded LRU map of preprocessed source texts, shared by the threads
+    of a process. Values are computed outside of the lock: two threads may
+    compute the same value at the same time, and both get the same result.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = compute()
+
+        with self.lock:
+            self.misses += 1
+            self.items[key] = value
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+        return value
+
+
+def setup(size):
+    """
+    Memoizes the sentence splitting of the source paragraphs (by stanza
+    model) and the tokenization of the source sentences (by model), so
+    that translating a text again with the same package (with alternatives,
+    or to several targets through the same pivot) preprocesses it only
+    once. size is the number of entries of each cache (0 disables them).
+    """
+    global sentences_cache, tokens_cache
+
+    if size > 0:
+        if sentences_cache is None or sentences_cache.size != size:
+            sentences_cache = MemoCache(size)
+            tokens_cache = MemoCache(size)
+    else:
+        sentences_cache = tokens_cache = None
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    moto = pytest.importorskip("moto")
+
+    from libretranslate.interlnkd.aws import util
+    from libretranslate.interlnkd.constants import INTERLNKD_LOVELACE_PRIVATE
+
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        monkeypatch.setattr(util, "s3_client", None)
+        client = util.get_s3_client()
+        client.create_bucket(Bucket=INTERLNKD_LOVELACE_PRIVATE)
+        yield client
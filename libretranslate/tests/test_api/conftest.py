@@ -1,3 +1,4 @@
+import os
 import sys
 
 import pytest
@@ -9,6 +10,8 @@ from libretranslate.main import get_args
 @pytest.fixture()
 def app():
     sys.argv = ['', '--load-only', 'en,es']
+    # Run the celery tasks in the process, with an in-memory broker
+    os.environ.setdefault("FLASK_CONFIG", "testing")
     app = create_app(get_args())
 
     yield app
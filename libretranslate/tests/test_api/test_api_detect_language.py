@@ -24,3 +24,21 @@ def test_api_detect_language_must_fail_bad_request_type(client):
     response = client.get("/detect")
 
     assert response.status_code == 405
+
+
+def test_api_detect_language_batch(client):
+    response = client.post("/detect", json={
+        "q": ["Hello world, how are you today?", "Hola amigo, ¿cómo estás hoy?", "Hello my friend, nice to meet you"]
+    })
+    response_json = json.loads(response.data)
+
+    # One detection for each text, in order
+    assert response.status_code == 200
+    assert [d["language"] for d in response_json] == ["en", "es", "en"]
+    assert all(0 < d["confidence"] <= 100 for d in response_json)
+
+
+def test_api_detect_language_batch_must_fail_with_non_string_items(client):
+    response = client.post("/detect", json={"q": ["Hello", 1]})
+
+    assert response.status_code == 400
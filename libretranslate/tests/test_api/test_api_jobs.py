@@ -0,0 +1,109 @@
+import json
+import sys
+import time
+
+import pytest
+
+from libretranslate.app import create_app
+from libretranslate.main import get_args
+
+
+@pytest.fixture()
+def limited_client():
+    sys.argv = ['', '--load-only', 'en,es', '--batch-limit', '2', '--char-limit', '20']
+    return create_app(get_args()).test_client()
+
+
+def test_api_jobs(client):
+    response = client.post("/jobs", json={
+        "q": ["Hello", "Good morning"],
+        "source": "en",
+        "target": "es",
+    })
+
+    assert response.status_code == 202
+    job_id = json.loads(response.data)["id"]
+
+    response = client.get(f"/jobs/{job_id}")
+    job = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert job["status"] == "completed"
+    assert "resultUrl" in job
+
+    response = client.get(f"/jobs/{job_id}/result")
+    result = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert len(result["translatedText"]) == 2
+
+
+def test_api_jobs_must_fail_without_parameters(client):
+    response = client.post("/jobs", json={"source": "en", "target": "es"})
+
+    assert response.status_code == 400
+
+
+def test_api_jobs_result_not_completed(client):
+    response = client.get("/jobs/unknown-job/result")
+
+    assert response.status_code == 400
+
+
+def test_api_jobs_html(client):
+    response = client.post("/jobs", json={
+        "q": ["<p>Hello <b>world</b></p>"],
+        "source": "en",
+        "target": "es",
+        "format": "html",
+    })
+
+    assert response.status_code == 202
+    job_id = json.loads(response.data)["id"]
+
+    response = client.get(f"/jobs/{job_id}/result")
+    result = json.loads(response.data)
+
+    assert response.status_code == 200
+    # The markup is kept, not translated as text
+    assert result["translatedText"][0].startswith("<p>")
+    assert "<b>" in result["translatedText"][0]
+
+
+def test_api_jobs_limits(limited_client):
+    def submit(q):
+        return limited_client.post("/jobs", json={"q": q, "source": "en", "target": "es"}).status_code
+
+    assert submit(["Hello", "World"]) == 202
+    assert submit(["Hello", "World", "Again"]) == 400
+    assert submit(["Hello", "This text is longer than the limit"]) == 400
+    assert submit(["Hello", 42]) == 400
+
+
+def test_api_jobs_progress(client):
+    from libretranslate.app import ext_celery
+
+    ext_celery.celery.backend.store_result("running-job", {
+        "started": time.time() - 60,
+        "done": 100,
+        "total": 400,
+        "chunks": 2,
+        "column": "product_name",
+        "rows_per_second": 1.67,
+        "characters_per_second": 40.5,
+    }, "PROGRESS")
+
+    response = client.get("/jobs/running-job")
+    job = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert job["status"] == "running"
+    assert job["progress"] == {
+        "done": 100,
+        "total": 400,
+        "chunks": 2,
+        "column": "product_name",
+        "rows_per_second": 1.67,
+        "characters_per_second": 40.5,
+    }
+    assert 170 <= job["eta"] <= 190
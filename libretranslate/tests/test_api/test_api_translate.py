@@ -1,4 +1,13 @@
 import json
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from libretranslate import cache, engine, language
+from libretranslate.app import create_app
+from libretranslate.main import get_args
 
 
 def test_api_translate(client):
@@ -32,6 +41,155 @@ def test_api_translate_batch(client):
     assert response.status_code == 200
 
 
+def test_api_translate_batch_alternatives(client):
+
+    response = client.post("/translate", json={
+        "q": ["Hello", "Good morning", "How are you?"],
+        "source": "en",
+        "target": "es",
+        "format": "text",
+        "alternatives": 2
+    })
+
+    response_json = json.loads(response.data)
+
+    assert len(response_json["translatedText"]) == 3
+    assert isinstance(response_json["alternatives"], list)
+    assert len(response_json["alternatives"]) == 3
+    assert all(isinstance(a, list) for a in response_json["alternatives"])
+    assert response.status_code == 200
+
+
+def test_api_translate_batch_auto_mixed_languages(client):
+
+    response = client.post("/translate", json={
+        "q": ["Hello, how are you doing today?", "Buenos días, ¿cómo estás hoy?"],
+        "source": "auto",
+        "target": "es",
+        "format": "text"
+    })
+
+    response_json = json.loads(response.data)
+
+    assert len(response_json["translatedText"]) == 2
+    assert [d["language"] for d in response_json["detectedLanguage"]] == ["en", "es"]
+    assert response.status_code == 200
+
+
+def test_api_translate_multiple_targets(client):
+
+    response = client.post("/translate", json={
+        "q": ["Hello", "World"],
+        "source": "en",
+        "target": ["es", "es"],
+        "format": "text"
+    })
+
+    response_json = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert list(response_json["translatedText"]) == ["es"]
+    assert len(response_json["translatedText"]["es"]) == 2
+
+    response = client.post("/translate", json={
+        "q": "Hello",
+        "source": "en",
+        "target": ["es", "xx"],
+    })
+
+    assert response.status_code == 400
+
+
+@pytest.fixture()
+def multi_target_client(monkeypatch):
+    # Fake fr and de models, which translate a text to "<text> (<target>)"
+    def get_language(code):
+        if code in ("fr", "de"):
+            return SimpleNamespace(code=code, name=code)
+        return language.get_language(code)
+
+    def get_translation(src_lang, tgt_lang):
+        if tgt_lang.code in ("fr", "de"):
+            return SimpleNamespace(from_lang=src_lang, to_lang=tgt_lang)
+        return language.get_translation(src_lang, tgt_lang)
+
+    def translate_texts(translation, texts, text_format="text", num_alternatives=0):
+        # Let the targets overlap, and the first one finish last
+        time.sleep(0.2 if translation.to_lang.code == "fr" else 0)
+        return [(f"{t} ({translation.to_lang.code})", []) for t in texts]
+
+    monkeypatch.setattr(language, "get_language", get_language)
+    monkeypatch.setattr(language, "get_translation", get_translation)
+    monkeypatch.setattr(engine, "translate_texts", translate_texts)
+
+    sys.argv = ['', '--load-only', 'en,es']
+    return create_app(get_args()).test_client()
+
+
+def test_api_translate_multiple_distinct_targets(multi_target_client):
+    response = multi_target_client.post("/translate", json={
+        "q": ["Hello", "World"],
+        "source": "en",
+        "target": ["fr", "de"],
+    })
+
+    response_json = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert response_json["translatedText"] == {
+        "fr": ["Hello (fr)", "World (fr)"],
+        "de": ["Hello (de)", "World (de)"],
+    }
+
+
+def test_api_translate_batch_auto_emojis_need_no_translator(client):
+
+    # The emoji item is echoed back: it must not require a en->en translation
+    response = client.post("/translate", json={
+        "q": ["Buenos días, ¿cómo estás hoy?", "😀"],
+        "source": "auto",
+        "target": "en",
+        "format": "text"
+    })
+
+    response_json = json.loads(response.data)
+
+    assert response.status_code == 200
+    assert response_json["translatedText"][1] == "😀"
+
+
+def test_api_translate_batch_emojis(client):
+
+    response = client.post("/translate", json={
+        "q": ["😀 🚀", "Hello"],
+        "source": "en",
+        "target": "es",
+        "format": "text"
+    })
+
+    response_json = json.loads(response.data)
+
+    assert response_json["translatedText"][0] == "😀 🚀"
+    assert response_json["translatedText"][1] != "Hello"
+    assert response.status_code == 200
+
+
+def test_api_translate_cached(client):
+    data = {
+        "q": "Good afternoon",
+        "source": "en",
+        "target": "es",
+        "format": "text"
+    }
+
+    first = json.loads(client.post("/translate", data=data).data)
+    hits = cache.get_cache().hits
+    second = json.loads(client.post("/translate", data=data).data)
+
+    assert second["translatedText"] == first["translatedText"]
+    assert cache.get_cache().hits == hits + 1
+
+
 def test_api_translate_unsupported_language(client):
     response = client.post("/translate", data={
         "q": "Hello",
@@ -59,3 +217,53 @@ def test_api_translate_missing_parameter(client):
     assert "error" in response_json
     assert response_json["error"] == "Invalid request: missing q parameter"
     assert response.status_code == 400
+
+
+def test_api_translate_stream(client):
+    body = "\n".join(json.dumps(item) for item in ["Hello", {"q": "Good morning", "id": 7}, "How are you?"]) + "\n"
+
+    response = client.post("/translate/stream?source=en&target=es", data=body, content_type="application/x-ndjson")
+
+    lines = [json.loads(l) for l in response.data.decode("utf-8").splitlines()]
+
+    assert response.status_code == 200
+    assert len(lines) == 3
+    assert all("translatedText" in l for l in lines)
+    assert lines[1]["id"] == 7
+
+
+def test_api_translate_stream_rejected_batches_charge_no_limit():
+    sys.argv = ['', '--load-only', 'en,es', '--req-limit', '6', '--daily-req-limit', '3']
+    client = create_app(get_args()).test_client()
+
+    def stream(texts):
+        body = "".join(json.dumps(t) + "\n" for t in texts)
+        response = client.post("/translate/stream?source=en&target=es", data=body, content_type="application/x-ndjson")
+        return [json.loads(l) for l in response.data.decode("utf-8").splitlines()]
+
+    # Over the daily limit: the minute limit must not be charged either
+    lines = stream(["Hello", "Good morning", "How are you?", "Goodbye"])
+    assert "error" in lines[-1]
+
+    lines = stream(["Hello", "Goodbye"])
+    assert all("translatedText" in l for l in lines)
+
+
+def test_api_translate_stream_invalid_line(client):
+    response = client.post("/translate/stream?source=en&target=es", data='"Hello"\nnot json\n', content_type="application/x-ndjson")
+
+    lines = [json.loads(l) for l in response.data.decode("utf-8").splitlines()]
+
+    assert "error" in lines[-1]
+
+
+def test_api_translate_stream_invalid_encoding(client):
+    body = b'"Hello"\n"Caf\xe9"\n'
+
+    response = client.post("/translate/stream?source=en&target=es", data=body, content_type="application/x-ndjson")
+
+    lines = [json.loads(l) for l in response.data.decode("utf-8").splitlines()]
+
+    assert response.status_code == 200
+    assert len(lines) == 1
+    assert "UTF-8" in lines[0]["error"]
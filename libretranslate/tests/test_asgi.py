@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+import time
+
+from libretranslate.asgi import AsgiApp
+
+
+def slow_wsgi_app(environ, start_response):
+    time.sleep(0.2)
+    body = json.dumps({"path": environ["PATH_INFO"], "thread": threading.current_thread().name}).encode("utf-8")
+    start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+async def call(app, path):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "query_string": b"", "http_version": "1.1", "headers": []}
+    await app(scope, receive, send)
+
+    status = messages[0]["status"]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return status, json.loads(body)
+
+
+def test_asgi_api_requests_run_concurrently():
+    app = AsgiApp(slow_wsgi_app, threads=4)
+
+    async def run():
+        start = time.time()
+        results = await asyncio.gather(*[call(app, "/translate") for i in range(4)])
+        return results, time.time() - start
+
+    results, elapsed = asyncio.run(run())
+
+    assert all(status == 200 for status, body in results)
+    assert all(body["thread"].startswith("libretranslate-asgi") for status, body in results)
+    assert elapsed < 0.6
+
+
+def test_asgi_other_routes_use_wsgi_adapter():
+    app = AsgiApp(slow_wsgi_app, threads=4)
+
+    status, body = asyncio.run(call(app, "/health"))
+
+    assert status == 200
+    assert body["path"] == "/health"
+    assert not body["thread"].startswith("libretranslate-asgi")
+
+
+def streaming_wsgi_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "application/x-ndjson")])
+
+    def generate():
+        for i in range(3):
+            yield json.dumps({"line": i, "time": time.time()}).encode("utf-8") + b"\n"
+            time.sleep(0.2)
+
+    return generate()
+
+
+def test_asgi_stream_is_not_buffered():
+    app = AsgiApp(streaming_wsgi_app, threads=4)
+    received = []
+
+    async def receive():
+        return {"type": "http.request", "body": b'"Hello"\n', "more_body": False}
+
+    async def send(message):
+        received.append((time.time(), message))
+
+    scope = {"type": "http", "method": "POST", "path": "/translate/stream", "query_string": b"", "http_version": "1.1", "headers": []}
+    asyncio.run(app(scope, receive, send))
+
+    assert received[0][1]["status"] == 200
+    lines = [(t, json.loads(m["body"])) for t, m in received[1:] if m.get("body")]
+    assert [line["line"] for t, line in lines] == [0, 1, 2]
+
+    # Each line is sent as soon as it is produced, not with the last one
+    assert all(t - line["time"] < 0.15 for t, line in lines)
+    assert received[-1][1] == {"type": "http.response.body"}
@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from timeit import default_timer
+
+import pytest
+
+from libretranslate import batcher as batcher_module
+from libretranslate.batcher import MicroBatcher
+
+
+class FakeLanguage:
+    def __init__(self, code):
+        self.code = code
+
+
+class FakeTranslation:
+    def __init__(self, source="es", target="en"):
+        self.from_lang = FakeLanguage(source)
+        self.to_lang = FakeLanguage(target)
+
+
+class FakeEngine:
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    def translate_texts(self, translation, texts, text_format="text", num_alternatives=0):
+        self.calls.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return [(t.upper(), []) for t in texts]
+
+
+@pytest.fixture
+def fake_engine(monkeypatch):
+    fake = FakeEngine()
+    monkeypatch.setattr(batcher_module, "engine", fake)
+    return fake
+
+
+def translate_concurrently(batcher, requests):
+    translation = FakeTranslation()
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        futures = [executor.submit(batcher.translate, translation, texts) for texts in requests]
+        return [f.result() for f in futures]
+
+
+def test_batcher_coalesces_concurrent_requests(fake_engine):
+    batcher = MicroBatcher(max_batch_size=4, max_wait_ms=5000)
+
+    results = translate_concurrently(batcher, [["a"], ["b", "c"], ["d"]])
+
+    # One model call, flushed as soon as the batch is full
+    assert len(fake_engine.calls) == 1
+    assert sorted(fake_engine.calls[0]) == ["a", "b", "c", "d"]
+    assert results == [[("A", [])], [("B", []), ("C", [])], [("D", [])]]
+    assert batcher.batches == 1
+    assert batcher.fill_rate() == 1.0
+
+    batcher.shutdown()
+
+
+def test_batcher_keeps_language_pairs_apart(fake_engine):
+    batcher = MicroBatcher(max_batch_size=2, max_wait_ms=5000)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(batcher.translate, FakeTranslation(source), [text])
+                   for source, text in (("es", "a"), ("fr", "b"), ("es", "c"), ("fr", "d"))]
+        results = [f.result() for f in futures]
+
+    assert sorted(sorted(c) for c in fake_engine.calls) == [["a", "c"], ["b", "d"]]
+    assert results == [[("A", [])], [("B", [])], [("C", [])], [("D", [])]]
+
+    batcher.shutdown()
+
+
+def test_batcher_flushes_after_timeout(fake_engine):
+    batcher = MicroBatcher(max_batch_size=100, max_wait_ms=50)
+
+    start = default_timer()
+    assert batcher.translate(FakeTranslation(), ["a"]) == [("A", [])]
+
+    # Not full: sent when the request has waited max_wait_ms
+    assert default_timer() - start >= 0.05
+    assert fake_engine.calls == [["a"]]
+    assert batcher.fill_rate() == 0.01
+
+    batcher.shutdown()
+
+
+def test_batcher_propagates_errors_to_every_request(monkeypatch):
+    monkeypatch.setattr(batcher_module, "engine", FakeEngine(error=ValueError("model failure")))
+    batcher = MicroBatcher(max_batch_size=3, max_wait_ms=5000)
+    translation = FakeTranslation()
+
+    errors = []
+    def translate(texts):
+        try:
+            batcher.translate(translation, texts)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=translate, args=([t],)) for t in ("a", "b", "c")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert errors == ["model failure"] * 3
+
+    batcher.shutdown()
+
+
+def test_batcher_shutdown_flushes_pending_requests(fake_engine):
+    batcher = MicroBatcher(max_batch_size=100, max_wait_ms=60000)
+    translation = FakeTranslation()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(batcher.translate, translation, ["a"])
+        while not batcher.pending:
+            pass
+
+        batcher.shutdown()
+        assert future.result(5) == [("A", [])]
+
+    assert not batcher.thread.is_alive()
+    with pytest.raises(Exception, match="shut down"):
+        batcher.translate(translation, ["b"])
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("moto")
+
+from libretranslate.interlnkd import utils
+from libretranslate.interlnkd.checkpoints import LocalCheckpointStore, S3CheckpointStore
+from libretranslate.interlnkd.constants import (
+    INTERLNKD_LOVELACE_PRIVATE,
+    TRANSLATIONS_CHECKPOINTS_FOLDER,
+    TRANSLATIONS_COMPLETED_FOLDER,
+)
+from libretranslate.interlnkd.jobspec import JobSpec
+
+DATA = b"product_name\nshoe\nhat\nsock\nbag\nbelt\n"
+SPEC = JobSpec(columns=["product_name"], targets=["en"], chunk_rows=2, required_columns=["product_name"])
+
+
+class FakeTranslator:
+    """Translates chunks to uppercase, and can fail on one of them"""
+    def __init__(self, fail_on=None):
+        self.calls = 0
+        self.translated = []
+        self.fail_on = fail_on
+
+    def __call__(self, df, market, spec=None, progress=None):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise Exception("Translation failed")
+
+        self.translated.append(df["product_name"].tolist())
+        df["product_name_en"] = df["product_name"].str.upper()
+        return df
+
+
+def run(monkeypatch, key, translator):
+    monkeypatch.setattr(utils, "translate_chunk", translator)
+    return asyncio.run(utils.translate_csv_file(key, "uk", spec=SPEC, move_on_failure=False))
+
+
+def read_output(s3, key):
+    return s3.get_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key=TRANSLATIONS_COMPLETED_FOLDER + key)['Body'].read()
+
+
+@pytest.fixture(params=["local", "s3"])
+def checkpoint_store(request, monkeypatch, tmp_path, s3):
+    if request.param == "local":
+        monkeypatch.setattr(utils, "get_checkpoint_store", lambda job_id: LocalCheckpointStore(job_id, str(tmp_path)))
+    else:
+        monkeypatch.setattr(utils, "get_checkpoint_store", lambda job_id: S3CheckpointStore(job_id))
+    return request.param
+
+
+def test_checkpoints_resume(monkeypatch, s3, checkpoint_store):
+    s3.put_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key="pending/uk/clean.csv", Body=DATA)
+    s3.put_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key="pending/uk/resumed.csv", Body=DATA)
+
+    run(monkeypatch, "pending/uk/clean.csv", FakeTranslator())
+
+    # The second chunk fails: the first one stays checkpointed
+    failing = FakeTranslator(fail_on=2)
+    with pytest.raises(Exception, match="Translation failed"):
+        run(monkeypatch, "pending/uk/resumed.csv", failing)
+    assert failing.translated == [["shoe", "hat"]]
+
+    # The retry only translates the remaining chunks
+    retry = FakeTranslator()
+    assert run(monkeypatch, "pending/uk/resumed.csv", retry) == ("pending/uk/resumed.csv", "uk")
+    assert retry.translated == [["sock", "bag"], ["belt"]]
+
+    assert read_output(s3, "uk/resumed.csv") == read_output(s3, "uk/clean.csv")
+    assert read_output(s3, "uk/resumed.csv") == b"product_name,product_name_en\nshoe,SHOE\nhat,HAT\nsock,SOCK\nbag,BAG\nbelt,BELT\n"
+
+
+def test_checkpoints_cleared(monkeypatch, s3, tmp_path, checkpoint_store):
+    s3.put_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key="pending/uk/a.csv", Body=DATA)
+
+    run(monkeypatch, "pending/uk/a.csv", FakeTranslator())
+
+    # A completed job leaves no checkpoints behind
+    assert list(tmp_path.iterdir()) == []
+    assert s3.list_objects_v2(Bucket=INTERLNKD_LOVELACE_PRIVATE, Prefix=TRANSLATIONS_CHECKPOINTS_FOLDER)['KeyCount'] == 0
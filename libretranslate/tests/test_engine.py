@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from libretranslate import cache, engine
+
+SPANISH = {"Hello.": "Hola.", "World.": "Mundo.", "Good.": "Bueno."}
+
+
+def test_translate_pivoted_reads_the_cache(monkeypatch):
+    monkeypatch.setattr(cache, "cache", cache.MemoryCache())
+
+    calls = []
+    def translate_raw(translation, texts):
+        calls.append(list(texts))
+        return [SPANISH[t] for t in texts]
+
+    monkeypatch.setattr(engine, "get_pivot", lambda translation: ("de->en", "en->es"))
+    monkeypatch.setattr(engine, "translate_raw", translate_raw)
+    translation = SimpleNamespace(from_lang=SimpleNamespace(code="de"), to_lang=SimpleNamespace(code="es"))
+
+    assert engine.translate_pivoted(translation, ["Hallo.", "Welt."], ["Hello.", "World."]) == [("Hola.", []), ("Mundo.", [])]
+
+    # Cached texts don't go through the second model again
+    assert engine.translate_pivoted(translation, ["Hallo.", "Gut."], ["Hello.", "Good."]) == [("Hola.", []), ("Bueno.", [])]
+    assert calls == [["Hello.", "World."], ["Good."]]
+
+    assert engine.translate_pivoted(translation, ["Welt."], ["World."]) == [("Mundo.", [])]
+    assert len(calls) == 2
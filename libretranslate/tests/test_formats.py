@@ -0,0 +1,56 @@
+import io
+
+import pandas as pd
+import pytest
+
+from libretranslate.interlnkd.formats import get_file_format
+
+
+def translate(file_format, data, chunk_rows):
+    chunks = []
+    for i, df in enumerate(file_format.read_chunks(io.BytesIO(data), chunk_rows, ["name"])):
+        df["name_en"] = df["name"].str.upper()
+        chunks.append(file_format.serialize_chunk(df, i, ["name_en"]))
+
+    out = io.BytesIO()
+    file_format.write(io.BytesIO(data), out, chunks, chunk_rows)
+    return out.getvalue()
+
+
+def test_csv_format():
+    data = b"id,name\n1,shoe\n2,hat\n3,sock\n"
+
+    output = translate(get_file_format("feed.CSV"), data, 2)
+
+    assert output == b"id,name,name_en\n1,shoe,SHOE\n2,hat,HAT\n3,sock,SOCK\n"
+
+
+def test_csv_format_streams_chunks():
+    data = b"id,name\n" + b"".join(f"{i},item {i}\n".encode() for i in range(10))
+    file_format = get_file_format("feed.csv")
+
+    # The file is read a few rows at a time, not all at once
+    chunks = list(file_format.read_chunks(io.BytesIO(data), 4, ["name"]))
+    assert [len(df) for df in chunks] == [4, 4, 2]
+
+    # Only the first chunk writes the header
+    assert file_format.serialize_chunk(chunks[0], 0, []).startswith(b"id,name\n")
+    assert file_format.serialize_chunk(chunks[1], 1, []) == b"4,item 4\n5,item 5\n6,item 6\n7,item 7\n"
+
+    assert translate(file_format, data, 4) == translate(file_format, data, 0)
+
+
+def test_parquet_format():
+    pytest.importorskip("pyarrow")
+
+    data = io.BytesIO()
+    pd.DataFrame({"id": [1, 2, 3], "name": ["shoe", "hat", "sock"]}).to_parquet(data)
+
+    output = pd.read_parquet(io.BytesIO(translate(get_file_format("feed.parquet"), data.getvalue(), 2)))
+
+    assert output["id"].tolist() == [1, 2, 3]
+    assert output["name_en"].tolist() == ["SHOE", "HAT", "SOCK"]
+
+
+def test_unsupported_format():
+    assert get_file_format("feed.xlsx") is None
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from libretranslate.interlnkd import utils
+from libretranslate.interlnkd.jobspec import JobSpec
+
+
+def test_job_spec():
+    spec = JobSpec.from_dict({"columns": ["product_name", "raw_category"], "targets": ["en", "de"], "max_length": 10})
+
+    assert spec.target_columns() == ["product_name_en", "raw_category_en", "product_name_de", "raw_category_de"]
+    assert spec.max_length == {"product_name": 10, "raw_category": 10}
+    assert JobSpec().target_columns() == ["product_name_en", "description_en"]
+
+    for invalid in ({"columns": []}, {"targets": "en"}, {"chunk_rows": "100"}, {"max_length": 0}, {"colums": ["a"]}):
+        with pytest.raises(ValueError):
+            JobSpec.from_dict(invalid)
+
+
+def test_translate_chunk_spec(monkeypatch):
+    batches = []
+
+    def translate_batch(payload):
+        batches.append((payload["target"], list(payload["q"])))
+        return {"translatedText": [f"{payload['target']}:{t}" for t in payload["q"]]}
+
+    monkeypatch.setattr(utils, "translate_batch", translate_batch)
+
+    df = pd.DataFrame({"product_name": ["shoe", "hat", "shoe"], "description": ["shoe", None, "a long text"]})
+    spec = JobSpec(columns=["product_name", "description"], targets=["en", "de"], max_length={"description": 6})
+
+    df = utils.translate_chunk(df, "fr", spec=spec, max_workers=1)
+
+    # Each distinct value is translated once per target, across columns
+    assert batches == [("en", ["shoe", "hat", "oov", "a long"]), ("de", ["shoe", "hat", "oov", "a long"])]
+    assert df["product_name_de"].tolist() == ["de:shoe", "de:hat", "de:shoe"]
+    assert df["description_en"].tolist() == ["en:shoe", "en:oov", "en:a long"]
@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from libretranslate.init import boot
+from libretranslate.language import get_language, get_translation, load_languages
+
+
+def test_language_registry():
+    boot(["en", "es"])
+    languages = load_languages()
+
+    for lang in languages:
+        assert get_language(lang.code) is lang
+    assert get_language("xx") is None
+
+
+def test_translation_registry():
+    boot(["en", "es"])
+    es, en = get_language("es"), get_language("en")
+
+    translation = get_translation(es, en)
+
+    assert translation is not None
+    assert translation.from_lang.code == "es" and translation.to_lang.code == "en"
+    assert get_translation(es, en) is translation
+
+    # The same translator for every thread
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        translations = list(executor.map(lambda i: get_translation(es, en), range(32)))
+    assert all(t is translation for t in translations)
@@ -0,0 +1,13 @@
+import sys
+
+import pytest
+
+from libretranslate import memory
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="requires /proc")
+def test_memory_usage():
+    usage = memory.get_memory_usage()
+
+    assert usage["rss"] > 0
+    assert usage["shared"] + usage["private"] == usage["rss"]
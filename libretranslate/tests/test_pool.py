@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import sys
+import types
+
+from libretranslate import engine, pool
+from libretranslate.init import boot
+from libretranslate.language import get_language, get_translation
+
+
+def test_pool_translates_like_the_process():
+    boot(["en", "es"])
+    translation = get_translation(get_language("es"), get_language("en"))
+    texts = ["Hola mundo", "¿Cómo estás?", "El perro come.", "Buenos días.\n\nAdiós."]
+
+    translation_pool = pool.TranslationPool(2, threads=1, min_split=1)
+    try:
+        assert translation_pool.translate("es", "en", texts) == engine.translate_missing(translation, texts)
+        assert translation_pool.translate("es", "en", texts, "text", 2) == engine.translate_missing(translation, texts, "text", 2)
+        assert translation_pool.translate_raw("es", "en", texts) == engine.translate_raw(translation, texts)
+    finally:
+        translation_pool.shutdown()
+
+
+def init_worker(monkeypatch, cores_per_worker):
+    # Runs the initializer in this process, without touching the thread
+    # settings of the test process
+    monkeypatch.setattr(engine, "intra_threads", engine.intra_threads)
+    monkeypatch.setitem(sys.modules, "torch", types.SimpleNamespace(set_num_threads=lambda n: None))
+
+    counter = multiprocessing.Value('i', 1)
+    pool.init_worker(counter, cores_per_worker, 1, [], 0, 0)
+    assert counter.value == 2
+
+
+def test_pool_worker_pinning(monkeypatch):
+    pinned = []
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1, 2, 3}, raising=False)
+    monkeypatch.setattr(os, "sched_setaffinity", lambda pid, cores: pinned.append(cores), raising=False)
+
+    init_worker(monkeypatch, 2)
+
+    # The second worker gets the next cores
+    assert pinned == [[2, 3]]
+
+
+def test_pool_worker_without_pinning(monkeypatch):
+    # e.g. macOS has no sched_setaffinity: workers start unpinned
+    monkeypatch.delattr(os, "sched_setaffinity", raising=False)
+
+    init_worker(monkeypatch, 2)
+
+    assert engine.intra_threads == 1
+
+
+def test_pool_slots_split_the_cores(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(pool, "slot", (0, 1))
+    monkeypatch.setattr(pool, "pool", pool.TranslationPool(2))
+
+    assert pool.pool.cores_per_worker == 4
+
+    # The second of two pools on the host: its workers start at the fifth core
+    pool.set_slot(1, 2)
+    assert pool.pool.cores_per_worker == 2
+    assert pool.pool.executor._initargs[0].value == 2
+    assert pool.pool.executor._initargs[1] == 2
+
+    pool.pool.shutdown()
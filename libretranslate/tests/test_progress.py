@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from libretranslate.interlnkd import progress as progress_module
+from libretranslate.interlnkd.progress import TranslationProgress
+
+
+class FakeCounter:
+    def __init__(self):
+        self.values = {}
+
+    def labels(self, *labels):
+        return SimpleNamespace(inc=lambda amount: self.values.__setitem__(labels, self.values.get(labels, 0) + amount))
+
+
+def test_translation_progress(monkeypatch):
+    rows, characters = FakeCounter(), FakeCounter()
+    monkeypatch.setattr(progress_module, "counters", (rows, characters))
+
+    states = []
+    heartbeats = []
+    task = SimpleNamespace(request=SimpleNamespace(id="task-id"), update_state=lambda state, meta: states.append((state, meta)))
+    progress = TranslationProgress(task, "uk", heartbeat=lambda: heartbeats.append(1))
+
+    progress.column_started("product_name,description")
+    progress.texts_translated(["zapato", "rojo"])
+    progress.chunk_done(2)
+
+    assert len(states) == len(heartbeats) == 3
+    assert all(state == "PROGRESS" for state, meta in states)
+
+    meta = states[-1][1]
+    assert set(meta) == {"started", "done", "chunks", "column", "rows_per_second", "characters_per_second"}
+    assert meta["done"] == 2
+    assert meta["chunks"] == 1
+    assert meta["column"] == "product_name,description"
+    assert meta["rows_per_second"] > 0 and meta["characters_per_second"] > 0
+
+    assert rows.values == {("uk",): 2}
+    assert characters.values == {("uk", "product_name,description"): 10}
+
+
+def test_translation_progress_without_task(monkeypatch):
+    monkeypatch.setattr(progress_module, "counters", (FakeCounter(), FakeCounter()))
+
+    # Outside of a celery task (e.g. a direct call): nothing is published
+    task = SimpleNamespace(request=SimpleNamespace(id=None), update_state=None)
+    progress = TranslationProgress(task, "uk")
+    progress.chunk_done(5)
+
+    assert progress.get_state()["done"] == 5
@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+from libretranslate.residency import ModelResidency
+
+
+class FakeLanguage:
+    def __init__(self, code):
+        self.code = code
+
+
+class FakePackage:
+    def __init__(self, path):
+        self.package_path = path
+
+
+class FakeTranslation:
+    def __init__(self, path, code, size):
+        (path / "model").mkdir(parents=True)
+        (path / "model" / "model.bin").write_bytes(b"\0" * size)
+        self.pkg = FakePackage(path)
+        self.from_lang = FakeLanguage(code)
+        self.to_lang = FakeLanguage("en")
+        self.translator = None
+
+
+def load(translation):
+    if translation.translator is None:
+        translation.translator = object()
+    return translation.translator
+
+
+def test_residency_evicts_least_recently_used(tmp_path):
+    a, b, c = [FakeTranslation(tmp_path / code, code, 1000) for code in ("a", "b", "c")]
+    manager = ModelResidency(2500)
+
+    for t in (a, b, a, c):
+        manager.acquire(t, load)
+
+    assert b.translator is None
+    assert a.translator is not None and c.translator is not None
+    assert manager.resident_bytes() == 2000
+    assert manager.loads == 3
+    assert manager.evictions == 1
+
+    # Evicted models are loaded again on demand
+    manager.acquire(b, load)
+    assert b.translator is not None
+    assert a.translator is None
+
+
+def test_residency_loads_outside_the_lock(tmp_path):
+    a, b = [FakeTranslation(tmp_path / code, code, 1000) for code in ("a", "b")]
+    manager = ModelResidency(5000)
+    manager.acquire(a, load)
+
+    loading = threading.Event()
+    release = threading.Event()
+    loads = []
+
+    def slow_load(translation):
+        loads.append(translation)
+        loading.set()
+        release.wait(5)
+        return load(translation)
+
+    threads = [threading.Thread(target=manager.acquire, args=(b, slow_load)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    assert loading.wait(5)
+
+    # A loaded model is served while another one is loading
+    assert manager.acquire(a, load) is a.translator
+
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    # Concurrent callers of the same model wait for a single load
+    assert loads == [b]
+    assert b.translator is not None
+    assert manager.loads == 2
+
+
+def test_residency_failed_load(tmp_path):
+    a = FakeTranslation(tmp_path / "a", "a", 1000)
+    manager = ModelResidency(5000)
+
+    def failing_load(translation):
+        raise Exception("Cannot load")
+
+    with pytest.raises(Exception, match="Cannot load"):
+        manager.acquire(a, failing_load)
+
+    # The reservation is released, and the next call loads the model again
+    assert manager.resident_bytes() == 0
+    assert manager.acquire(a, load) is a.translator
+    assert manager.resident_bytes() == 1000
@@ -0,0 +1,31 @@
+import asyncio
+import threading
+
+import pytest
+
+moto = pytest.importorskip("moto")
+
+from libretranslate.interlnkd.aws import util
+from libretranslate.interlnkd.constants import INTERLNKD_LOVELACE_PRIVATE
+from libretranslate.interlnkd.utils import move_file_to_new_folder
+
+
+def test_s3_client_shared(s3):
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(util.get_s3_client())) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(c is s3 for c in clients)
+
+
+def test_s3_move_and_stream(s3):
+    s3.put_object(Bucket=INTERLNKD_LOVELACE_PRIVATE, Key="pending/uk/a.csv", Body=b"product_name\nshoe\n")
+
+    asyncio.run(move_file_to_new_folder("failed/uk/", "a.csv", INTERLNKD_LOVELACE_PRIVATE, "pending/uk/a.csv"))
+
+    assert util.scan_s3_folder(INTERLNKD_LOVELACE_PRIVATE, "pending/") == []
+    with util.open_s3_file("failed/uk/a.csv", "rb") as f:
+        assert f.read() == b"product_name\nshoe\n"
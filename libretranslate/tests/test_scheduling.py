@@ -0,0 +1,105 @@
+from libretranslate.interlnkd import scheduling
+from libretranslate.interlnkd.constants import (
+    TRANSLATIONS_PENDING_FOLDER,
+    TRANSLATIONS_PROCESSING_FOLDER,
+    TRANSLATIONS_QUEUE_LARGE,
+    TRANSLATIONS_QUEUE_SMALL,
+)
+
+MB = 1024 * 1024
+
+
+def test_priority():
+    assert scheduling.get_priority(100) == 0
+    assert scheduling.get_priority(MB) == 0
+    assert scheduling.get_priority(3 * MB) == 2
+    assert scheduling.get_priority(10 * 1024 * MB) == 9
+
+
+def test_route(monkeypatch):
+    monkeypatch.setattr(scheduling, "get_object_size", lambda key: 2 * MB)
+    assert scheduling.get_route("key") == {"queue": TRANSLATIONS_QUEUE_SMALL, "priority": 2}
+
+    monkeypatch.setattr(scheduling, "get_object_size", lambda key: 500 * MB)
+    assert scheduling.get_route("key") == {"queue": TRANSLATIONS_QUEUE_LARGE, "priority": 9}
+
+
+def test_pending_files_alternate_markets(monkeypatch):
+    pending = {
+        "uk": ["a.csv", "b.csv", "c.csv", "notes.txt"],
+        "de": ["d.csv"],
+    }
+    monkeypatch.setattr(scheduling, "list_markets", lambda: list(pending))
+    monkeypatch.setattr(scheduling, "scan_s3_folder", lambda bucket, folder: pending[folder.rstrip("/").split("/")[-1]])
+
+    assert scheduling.list_pending_files() == ["a.csv", "d.csv", "b.csv", "c.csv"]
+
+
+def test_dispatch_pending_files(monkeypatch):
+    claimed = set()
+
+    def claim_file(key, redis=None):
+        if key in claimed:
+            return None
+        claimed.add(key)
+        return "processing/" + key, MB, "task-" + key
+
+    monkeypatch.setattr(scheduling, "list_pending_files", lambda: ["a.csv", "b.csv", "a.csv"])
+    monkeypatch.setattr(scheduling, "claim_file", claim_file)
+
+    dispatched = []
+    keys = scheduling.dispatch_pending_files(lambda key, options: dispatched.append((key, options["queue"], options["task_id"])),
+                                             concurrency=2)
+
+    assert sorted(keys) == ["processing/a.csv", "processing/b.csv"]
+    assert sorted(dispatched) == [("processing/a.csv", TRANSLATIONS_QUEUE_SMALL, "task-a.csv"),
+                                  ("processing/b.csv", TRANSLATIONS_QUEUE_SMALL, "task-b.csv")]
+
+
+class FakeRedis:
+    # Only what the claims use; values are bytes as with redis-py
+    def __init__(self):
+        self.values = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = str(value).encode()
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def expire(self, key, seconds):
+        return key in self.values
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+def test_requeue_lost_files(monkeypatch):
+    redis = FakeRedis()
+    running = TRANSLATIONS_PROCESSING_FOLDER + "uk/running.csv"
+    lost = TRANSLATIONS_PROCESSING_FOLDER + "uk/lost.csv"
+    moved = []
+
+    monkeypatch.setattr(scheduling, "get_s3_client", lambda: None)
+    monkeypatch.setattr(scheduling, "scan_s3_folder", lambda bucket, folder: [running, lost, TRANSLATIONS_PROCESSING_FOLDER + "uk/notes.txt"])
+    monkeypatch.setattr(scheduling, "move_file", lambda s3_client, key, new_key, etag=None: moved.append((key, new_key)))
+
+    # The task of running.csv holds its claim, the one of lost.csv is gone
+    redis.set(scheduling.get_claim_key(TRANSLATIONS_PENDING_FOLDER + "uk/running.csv"), "task")
+    assert scheduling.hold_claim(redis, running, "task")
+    assert not scheduling.hold_claim(redis, lost, "task")
+
+    assert scheduling.requeue_lost_files(redis) == [TRANSLATIONS_PENDING_FOLDER + "uk/lost.csv"]
+    assert moved == [(lost, TRANSLATIONS_PENDING_FOLDER + "uk/lost.csv")]
+
+    # The next scan can claim it again, and the lost task does not get it back
+    assert scheduling.get_claim_key(lost) not in redis.values
+    assert not scheduling.hold_claim(redis, lost, "task")
+
+    scheduling.release_claim(redis, running, "task")
+    assert scheduling.requeue_lost_files(redis) == [TRANSLATIONS_PENDING_FOLDER + "uk/running.csv",
+                                                    TRANSLATIONS_PENDING_FOLDER + "uk/lost.csv"]
+    assert scheduling.requeue_lost_files(None) == []
@@ -0,0 +1,62 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from libretranslate import engine, segmentation
+
+
+def test_memo_cache():
+    memo = segmentation.MemoCache(2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value.upper()
+
+    assert memo.get("a", lambda: compute("a")) == "A"
+    assert memo.get("a", lambda: compute("a")) == "A"
+    memo.get("b", lambda: compute("b"))
+    memo.get("c", lambda: compute("c"))
+    memo.get("a", lambda: compute("a"))
+
+    assert calls == ["a", "b", "c", "a"]
+    assert memo.hits == 1
+
+
+def test_tokenize_once():
+    segmentation.setup(100)
+    encoded = []
+    tokenizer = SimpleNamespace(encode=lambda s: encoded.append(s) or s.split())
+    pkg = SimpleNamespace(package_path=Path("/models/en_es"), tokenizer=tokenizer)
+
+    try:
+        assert engine.tokenize(pkg, "Hello world") == ["Hello", "world"]
+        assert engine.tokenize(pkg, "Hello world") == ["Hello", "world"]
+        assert encoded == ["Hello world"]
+    finally:
+        segmentation.setup(0)
+
+
+def test_split_sentences_per_stanza_model(monkeypatch):
+    segmentation.setup(100)
+    monkeypatch.setattr(engine.settings, "stanza_available", True)
+
+    # The en_es model splits on periods, the en_fr one does not split at all
+    calls = []
+    def get_stanza_pipeline(pkg):
+        def pipeline(paragraph):
+            calls.append((pkg.package_path.name, paragraph))
+            texts = paragraph.split(". ") if pkg.package_path.name == "en_es" else [paragraph]
+            return SimpleNamespace(sentences=[SimpleNamespace(text=text) for text in texts])
+        return pipeline
+
+    monkeypatch.setattr(engine, "get_stanza_pipeline", get_stanza_pipeline)
+    en_es = SimpleNamespace(type="translate", from_code="en", package_path=Path("/models/en_es"))
+    en_fr = SimpleNamespace(type="translate", from_code="en", package_path=Path("/models/en_fr"))
+
+    try:
+        assert engine.split_sentences(en_es, "Hello. World") == ["Hello", "World"]
+        assert engine.split_sentences(en_fr, "Hello. World") == ["Hello. World"]
+        assert engine.split_sentences(en_es, "Hello. World") == ["Hello", "World"]
+        assert calls == [("en_es", "Hello. World"), ("en_fr", "Hello. World")]
+    finally:
+        segmentation.setup(0)
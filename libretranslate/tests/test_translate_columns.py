@@ -0,0 +1,45 @@
+import pandas as pd
+
+from libretranslate.interlnkd import utils
+
+
+def fake_translate_batch(batches):
+    def translate_batch(payload):
+        batches.append(payload["q"])
+        return {"translatedText": [t.upper() for t in payload["q"]]}
+    return translate_batch
+
+
+def translate(monkeypatch, df, dedup):
+    batches = []
+    monkeypatch.setattr(utils, "translate_batch", fake_translate_batch(batches))
+
+    texts = {"product_name": df["product_name"], "description": df["description"]}
+    df = utils.translate_columns(df, texts, {"product_name": "product_name_en", "description": "description_en"},
+                                 "es", "en", chunk_size=2, max_workers=2, dedup=dedup)
+    return df, batches
+
+
+def test_translate_columns_dedup(monkeypatch):
+    df = pd.DataFrame({
+        "product_name": ["zapato", "gorro", "zapato", "oov"],
+        "description": ["oov", "rojo", "oov", "gorro"],
+    })
+
+    df, batches = translate(monkeypatch, df, dedup=True)
+
+    # Each distinct value is translated once, also across columns
+    assert sorted(t for batch in batches for t in batch) == ["gorro", "oov", "rojo", "zapato"]
+    assert all(len(batch) <= 2 for batch in batches)
+    assert df["product_name_en"].tolist() == ["ZAPATO", "GORRO", "ZAPATO", "OOV"]
+    assert df["description_en"].tolist() == ["OOV", "ROJO", "OOV", "GORRO"]
+
+
+def test_translate_columns_without_dedup(monkeypatch):
+    df = pd.DataFrame({"product_name": ["zapato", "zapato"], "description": ["rojo", "rojo"]})
+
+    df, batches = translate(monkeypatch, df, dedup=False)
+
+    assert sum(len(batch) for batch in batches) == 4
+    assert df["product_name_en"].tolist() == ["ZAPATO", "ZAPATO"]
+    assert df["description_en"].tolist() == ["ROJO", "ROJO"]
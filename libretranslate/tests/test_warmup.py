@@ -0,0 +1,17 @@
+from libretranslate import warmup
+from libretranslate.init import boot
+
+
+def test_warmup_pairs():
+    assert warmup.get_pairs("") == []
+    assert warmup.get_pairs("en:es, pt-BR:en") == [("en", "es"), ("pb", "en")]
+
+
+def test_warmup_run():
+    boot(["en", "es"])
+
+    times = warmup.run([("en", "es")])
+
+    assert ("en", "es") in warmup.warmed_up
+    assert warmup.run([("en", "es")]) == {}
+    assert all(t > 0 for t in times.values())
@@ -0,0 +1,111 @@
+import threading
+from timeit import default_timer
+
+from argostranslate import package
+
+from libretranslate import engine, pool
+from libretranslate.language import get_language, get_translation, iso2model
+
+WARMUP_TEXT = "Hello world."
+
+# Load (and first translation) time of the pairs already warmed up
+# in this process, in seconds
+warmed_up = {}
+lock = threading.Lock()
+load_time_gauge = None
+
+
+def get_pairs(spec):
+    """
+    Parses a comma separated list of source:target pairs (e.g. "en:es,es:en").
+    "all" selects every installed model.
+    """
+    spec = (spec or "").strip()
+    if not spec:
+        return []
+
+    if spec.lower() == "all":
+        return sorted({(p.from_code, p.to_code) for p in package.get_installed_packages()})
+
+    pairs = []
+    for pair in spec.split(","):
+        pair = pair.strip()
+        if not pair:
+            continue
+        if ":" not in pair:
+            raise ValueError(f"Invalid warm-up pair: {pair} (expected source:target)")
+
+        source, target = pair.split(":", 1)
+        pairs.append((iso2model(source.strip()), iso2model(target.strip())))
+
+    return pairs
+
+
+def warmup_pair(source, target):
+    src_lang = get_language(source)
+    tgt_lang = get_language(target)
+    translation = None
+    if src_lang is not None and tgt_lang is not None:
+        translation = get_translation(src_lang, tgt_lang)
+
+    if translation is None:
+        print(f"Cannot warm up {source}->{target}: not installed", flush=True)
+        return None
+
+    # A first translation loads the model, the tokenizer and the sentence
+    # splitter. It bypasses the translation cache so it always runs the model
+    start = default_timer()
+    engine.translate_missing(translation, [WARMUP_TEXT], "text", 0)
+    return default_timer() - start
+
+
+def run(pairs):
+    times = {}
+
+    with lock:
+        for source, target in pairs:
+            if (source, target) in warmed_up:
+                continue
+
+            try:
+                elapsed = warmup_pair(source, target)
+            except Exception as e:
+                print(f"Cannot warm up {source}->{target}: {str(e)}", flush=True)
+                continue
+
+            if elapsed is None:
+                continue
+
+            warmed_up[(source, target)] = times[(source, target)] = elapsed
+            print(f"Warmed up {source}->{target} in {elapsed:.2f}s", flush=True)
+
+            if load_time_gauge is not None:
+                load_time_gauge.labels(source, target).set(elapsed)
+
+    return times
+
+
+def setup(args):
+    global load_time_gauge
+
+    pairs = get_pairs(args.warmup)
+    if not pairs:
+        return {}
+
+    if args.metrics and load_time_gauge is None:
+        from prometheus_client import Gauge
+
+        load_time_gauge = Gauge('libretranslate_model_load_seconds', 'Time taken to load a language pair and run its first translation',
+                                ['source', 'target'], multiprocess_mode='max')
+
+    if pool.get_pool() is not None:
+        # The models run in the pool processes, which warm up when they start
+        pool.get_pool().start()
+        return {}
+
+    start = default_timer()
+    times = run(pairs)
+    if times:
+        print(f"Warmed up {len(times)} language pairs in {default_timer() - start:.2f}s", flush=True)
+
+    return times
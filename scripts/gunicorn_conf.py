@@ -1,42 +1,86 @@
+import itertools
 import re
 import sys
 
 from prometheus_client import multiprocess
 
+from libretranslate.default_values import DEFAULT_ARGUMENTS as DEFARGS
+
+args = None
+
 
 def child_exit(server, worker):
     multiprocess.mark_process_dead(worker.pid)
 
-def on_starting(server):
-    # Parse command line arguments
-    proc_name = server.cfg.default_proc_name
+def pre_fork(server, worker):
+    # Each worker gets the first slot that no running worker holds
+    used = {getattr(w, "pool_slot", None) for w in server.WORKERS.values()}
+    worker.pool_slot = next(i for i in itertools.count() if i not in used)
+
+def post_fork(server, worker):
+    from libretranslate import memory, pool, warmup
+
+    # The translation pools of the workers split the cores of the host
+    pool.set_slot(worker.pool_slot, server.cfg.workers)
+
+    # create_app warms up the models, but a preloaded app is created in the
+    # master, which must not load them: then the worker does it here, before
+    # it accepts its first request (or starts its translation pool)
+    if args.preload:
+        warmup.setup(args)
+    memory.report(f"Worker {worker.age}")
+
+def get_wsgi_argv(proc_name):
+    # The LibreTranslate arguments are given with the app, e.g. wsgi:app(api_keys=True)
+    argv = ['--wsgi']
+    if not proc_name.startswith("wsgi:app"):
+        return argv
+
     kwargs = {}
-    if proc_name.startswith("wsgi:app"):
-        str_args = re.sub(r'wsgi:app\s*\(\s*(.*)\s*\)', '\\1', proc_name).strip().split(",")
-        for a in str_args:
-            if "=" in a:
-                k,v = a.split("=")
-                k = k.strip()
-                v = v.strip()
-
-                if v.lower() in ["true", "false"]:
-                    v = v.lower() == "true"
-                    if not v:
-                        continue
-                elif v[0] == '"':
-                    v = v[1:-1]
-                kwargs[k] = v
+    str_args = re.sub(r'wsgi:app\s*\(\s*(.*)\s*\)', '\\1', proc_name).strip().split(",")
+    for a in str_args:
+        if "=" in a:
+            k,v = a.split("=")
+            k = k.strip()
+            v = v.strip()
 
-    from libretranslate.main import get_args
-    sys.argv = ['--wsgi']
+            if v.lower() in ["true", "false"]:
+                v = v.lower() == "true"
+                if not v:
+                    continue
+            elif v[0] == '"':
+                v = v[1:-1]
+            kwargs[k] = v
 
     for k in kwargs:
         ck = k.replace("_", "-")
         if isinstance(kwargs[k], bool) and kwargs[k]:
-            sys.argv.append("--" + ck)
+            argv.append("--" + ck)
         else:
-            sys.argv.append("--" + ck)
-            sys.argv.append(kwargs[k])
+            argv.append("--" + ck)
+            argv.append(kwargs[k])
+
+    return argv
+
+
+def get_preload():
+    # Gunicorn reads preload_app before on_starting: find the app in the
+    # gunicorn command line, so that wsgi:app(preload=True) applies like LT_PRELOAD
+    app_spec = next((a for a in sys.argv[1:] if a.startswith("wsgi:app")), "")
+    return DEFARGS['PRELOAD'] or "--preload" in get_wsgi_argv(app_spec)
+
+
+# With LT_PRELOAD or wsgi:app(preload=True), the master loads the app
+# before forking the workers
+preload_app = get_preload()
+
+
+def on_starting(server):
+    global args
+
+    # Parse command line arguments
+    from libretranslate.main import get_args
+    sys.argv = get_wsgi_argv(server.cfg.default_proc_name)
 
     args = get_args()
 
@@ -44,4 +88,4 @@ def on_starting(server):
     storage.setup(args.shared_storage)
     scheduler.setup(args)
     flood.setup(args)
-    secret.setup(args)
\ No newline at end of file
+    secret.setup(args)
@@ -1,4 +1,5 @@
 from libretranslate import main
+from libretranslate.default_values import DEFAULT_ARGUMENTS as DEFARGS
 import sys
 
 # Set WSGI mode
@@ -10,12 +11,15 @@ application = main()
 # For backwards compatibility, also provide 'app'
 app = application
 
-# For ASGI compatibility (uvicorn.workers.UvicornWorker)
+# For ASGI servers (uvicorn.workers.UvicornWorker)
 def create_asgi_app():
-    """Create ASGI application by wrapping the WSGI app"""
+    """Create the ASGI application, running API requests on a bounded thread pool"""
     try:
-        from asgiref.wsgi import WsgiToAsgi
-        return WsgiToAsgi(application)
+        from libretranslate.asgi import AsgiApp
+        url_prefix = DEFARGS['URL_PREFIX']
+        if url_prefix and not url_prefix.startswith('/'):
+            url_prefix = '/' + url_prefix
+        return AsgiApp(application, threads=DEFARGS['THREADS'], url_prefix=url_prefix)
     except ImportError:
         # If asgiref is not available, fall back to WSGI
         return application